@@ -5,6 +5,7 @@ import os
 # from .database import init_db
 # from .routes.auth_routes import auth_bp
 from .routes.stream_routes import stream_bp
+from .routes.ws_routes import register_ws
 # from .routes.user_routes import user_bp
 
 def create_app():
@@ -30,7 +31,15 @@ def create_app():
     # Register Blueprints
     # app.register_blueprint(auth_bp)
     app.register_blueprint(stream_bp)
+    register_ws(app)
     # app.register_blueprint(user_bp)
+
+    # Start the alarm writer now so alarms journaled during a DB outage are replayed at boot
+    from .services.detector import alarm_writer
+    from .services.alarm_writer import flush_on_exit
+    alarm_writer.start()
+    # Queued alarms reach MySQL (or the journal) on shutdown instead of being dropped
+    flush_on_exit(alarm_writer)
     
     @app.route('/')
     def index():
@@ -38,10 +47,19 @@ def create_app():
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
-        from .services.detector import sessions
+        from .services.detector import sessions, engine, rate_controller, camera_states, alarm_writer, session_stats
+        from .database import pool
+        from .services.settings_cache import notification_cache
         return jsonify({
             'status': 'running',
-            'active_sessions': len(sessions)
+            'active_sessions': len(sessions),
+            'inference': engine.stats(),
+            'inference_rate': rate_controller.totals(),
+            'camera_states': camera_states.stats(),
+            'db_pool': pool.stats(),
+            'alarm_writer': alarm_writer.stats(),
+            'notification_cache': notification_cache.stats(),
+            'sessions': {sid: session_stats(sid, s) for sid, s in list(sessions.items())}
         })
         
     @app.errorhandler(500)
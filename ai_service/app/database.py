@@ -1,10 +1,24 @@
 import mysql.connector
 import os
+from .db_pool import ConnectionPool
 
-def get_db_connection():
+def _connect():
     return mysql.connector.connect(
         host=os.getenv('DB_HOST', 'localhost'),
         user=os.getenv('DB_USER', 'root'),
         password=os.getenv('DB_PASSWORD', ''),
-        database=os.getenv('DB_NAME', 'firevision')
+        database=os.getenv('DB_NAME', 'firevision'),
+        connection_timeout=10
     )
+
+# Shared by the routes and the detector's alarm writes; close() returns a connection to the pool
+pool = ConnectionPool(
+    _connect,
+    size=int(os.getenv('DB_POOL_SIZE', 5)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    ping_after=float(os.getenv('DB_POOL_PING_AFTER', 30))
+)
+
+def get_db_connection():
+    """Borrow a pooled connection (raises PoolTimeout when none frees up in time)."""
+    return pool.acquire()
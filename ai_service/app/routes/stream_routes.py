@@ -1,18 +1,27 @@
-from flask import Blueprint, request, jsonify, Response, current_app
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 import cv2
+import json
 import uuid
+from itertools import groupby
 import time
 import os
 from ..utils.decorators import token_required
 from ..services.detector import load_model, generate_frames, sessions, model
 from ..services import detector
+from ..services.tiling import parse_rois
+from ..services.settings_cache import notification_cache
 # from ..database import get_db_connection (Removed for Microservice)
 
 stream_bp = Blueprint('stream', __name__, url_prefix='/api')
 
+# Upper bound on frames accepted by one /api/process-batch request
+MAX_BATCH_FRAMES = int(os.getenv("MAX_BATCH_FRAMES", "32"))
+
 @stream_bp.route('/start-detection', methods=['POST'])
 @token_required
 def start_detection(current_user):
+    camera_obj = None
+    session_id_str = None
     try:
         print("[START_DETECTION] Triggered for user:", current_user)
         
@@ -28,6 +37,10 @@ def start_detection(current_user):
         if not username:
             print("[START_DETECTION] ERROR: No username")
             return jsonify({'error': 'Username required'}), 400
+        try:
+            data = dict(data, **detector.parse_numeric_settings(data))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         camera_source = str(data.get('camera_source', 'WEBCAM')).upper()
         ip_camera_url = data.get('ip_camera_url') 
@@ -42,7 +55,29 @@ def start_detection(current_user):
             "smoothing": data.get("smoothing", False),
             "noiseReduction": data.get("noiseReduction", False),
             "playbackControls": data.get("playbackControls", False),
+            "frame_skip": data.get("frame_skip", detector.DEFAULT_FRAME_SKIP),
+            "motion_gate": data.get("motion_gate", True),
+            "motion_threshold": data.get("motion_threshold", 0.005),
+            "motion_refresh_s": data.get("motion_refresh_s", 5.0),
+            "prefilter": data.get("prefilter", False),
+            "tracking": data.get("tracking", True),
+            "confirm_frames": data.get("confirm_frames", 1),
+            "tiling": data.get("tiling", False),
+            "tile_size": data.get("tile_size", 640),
+            "tile_overlap": data.get("tile_overlap", 0.2),
+            "min_fps": data.get("min_fps"),
+            "ring_size": data.get("ring_size", 8),
+            "annotate": data.get("annotate", True),
+            "stream_width": data.get("stream_width", detector.DEFAULT_STREAM_WIDTH),
+            "max_fps": data.get("max_fps"),
         }
+        try:
+            initial_settings["rois"] = parse_rois(data.get("rois"))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid rois: {e}'}), 400
+        for key in detector.PREFILTER_SETTINGS:
+            if key in data:
+                initial_settings[key] = data[key]
         
         # Init Camera
         camera_obj = None
@@ -96,21 +131,17 @@ def start_detection(current_user):
         # Load notification settings from database
         notification_settings = {"telegram_enabled": False, "email_enabled": False}
         try:
-            from ..database import get_db_connection
-            conn = get_db_connection()
-            c = conn.cursor(dictionary=True)
-            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-            db_settings = c.fetchone()
+            db_settings = notification_cache.get(username)
             if db_settings:
                 notification_settings = db_settings
                 print(f"[START_DETECTION] Loaded notification settings for {username}")
             else:
                 print(f"[START_DETECTION] No notification settings found for {username}")
-            conn.close()
         except Exception as e:
             print(f"[START_DETECTION] Warning: Could not load notification settings: {e}")
         
         detector.sessions[session_id_str] = {
+            "id": session_id_str,
             "camera": camera_obj,
             "is_detecting": True,
             "settings": initial_settings,
@@ -121,16 +152,77 @@ def start_detection(current_user):
             "fire_was_detected": False,
             "frame_counter": 0,
             "owner": username,
-            "camera_name": data.get('camera_name', 'Camera')
+            "camera_name": data.get('camera_name', 'Camera'),
+            "grabber": None,
+            "broadcaster": None,
+            "jpeg_cache": detector.JpegCache(initial_settings["ring_size"]),
+            "frame_seq": None,
+            "producer": None,
+            "motion_gate": detector.create_motion_gate(initial_settings),
+            "prefilter": detector.create_prefilter(initial_settings),
+            "tracker": detector.create_tracker(initial_settings),
+            "state_feed": detector.StateFeed()
         }
+        # Start draining the camera and the single detection producer immediately;
+        # /api/video-feed viewers only subscribe to its encoded frames
+        detector.ensure_grabber(session_id_str, detector.sessions[session_id_str])
+        detector.ensure_producer(session_id_str, detector.sessions[session_id_str])
 
         print(f"[START_DETECTION] SUCCESS: Session created: {session_id_str}")
         return jsonify({'status': 'started', 'session_id': session_id_str})
 
     except Exception as e:
         print(f"[START_DETECTION] EXCEPTION: {type(e).__name__}: {e}")
+        # Don't leave the device busy for the next attempt
+        session = detector.sessions.pop(session_id_str, None) if session_id_str else None
+        if session is not None:
+            session["is_detecting"] = False
+            detector.stop_session_capture(session)
+        elif camera_obj is not None:
+            camera_obj.release()
         return jsonify({'error': f'Internal error: {str(e)}'}), 500
 
+def _apply_settings(session, data):
+    """Apply an update-settings payload (already validated) to one running session."""
+    settings = session["settings"]
+    for key in ('sensitivity', 'smoothing', 'noiseReduction', 'confirm_frames',
+                'tile_size', 'tile_overlap', 'stream_width', 'rois'):
+        if key in data:
+            settings[key] = data[key]
+    for key in ('tiling', 'annotate'):
+        if key in data:
+            settings[key] = bool(data[key])
+    if 'frame_skip' in data:
+        detector.set_frame_skip(session, data['frame_skip'])
+    detector.apply_motion_settings(session, data)
+    detector.apply_prefilter_settings(session, data)
+
+@stream_bp.route('/update-settings', methods=['POST'])
+@token_required
+def update_settings(current_user):
+    data = request.get_json() or {}
+    try:
+        data = dict(data, **detector.parse_numeric_settings(data))
+        if 'rois' in data:
+            data['rois'] = parse_rois(data['rois'])
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid settings: {e}'}), 400
+    
+    target_session_id = data.get('session_id')
+    
+    if target_session_id:
+        session = detector.sessions.get(target_session_id)
+        if session is None or session.get("owner") != current_user:
+            return jsonify({'error': 'Session not found'}), 404
+        _apply_settings(session, data)
+        return jsonify({'status': 'updated', 'session_id': target_session_id})
+    else:
+        # Every running session of this user (never other users' cameras)
+        for sid, session in list(detector.sessions.items()):
+            if session.get("owner") == current_user:
+                _apply_settings(session, data)
+        return jsonify({'status': 'updated_all'})
+
 @stream_bp.route('/stop-detection', methods=['POST'])
 @token_required
 def stop_detection(current_user):
@@ -142,8 +234,7 @@ def stop_detection(current_user):
             session = detector.sessions[target_session_id]
             session["is_detecting"] = False
             time.sleep(0.5) 
-            if session["camera"]:
-                session["camera"].release()
+            detector.stop_session_capture(session)
             del detector.sessions[target_session_id]
             print(f"🛑 Session stopped: {target_session_id}")
             return jsonify({'status': 'stopped', 'session_id': target_session_id})
@@ -155,8 +246,7 @@ def stop_detection(current_user):
             ids = list(detector.sessions.keys())
             for sid in ids:
                 detector.sessions[sid]["is_detecting"] = False
-                if detector.sessions[sid]["camera"]:
-                    detector.sessions[sid]["camera"].release()
+                detector.stop_session_capture(detector.sessions[sid])
             detector.sessions.clear()
             return jsonify({'status': 'stopped_all'})
         else:
@@ -172,7 +262,7 @@ def get_detections():
         return jsonify({'boxes': [], 'frame_w': 0, 'frame_h': 0})
     
     session = detector.sessions[session_id]
-    boxes = session.get('last_boxes', [])
+    boxes = detector.tracked_boxes(session)
     frame_w = session.get('last_frame_w', 0)
     frame_h = session.get('last_frame_h', 0)
     
@@ -182,6 +272,88 @@ def get_detections():
         'frame_h': frame_h
     })
 
+@stream_bp.route('/detections/all', methods=['GET'])
+@token_required
+def get_all_detections(current_user):
+    """Latest detections of every session owned by the user in one response.
+
+    With ``?since=<seq>`` only sessions whose state changed after that sequence
+    number are included; pass the returned ``seq`` back on the next call.
+    ``active`` lists all of the user's running sessions so the client can drop
+    tiles of sessions that ended.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an integer'}), 400
+
+    cursor = since
+    changed = {}
+    active = []
+    for session_id, session in list(detector.sessions.items()):
+        if session.get("owner") != current_user:
+            continue
+        active.append(session_id)
+        feed = session.get("state_feed")
+        seq = feed.seq if feed is not None else 0
+        if since and seq <= since:
+            continue
+        cursor = max(cursor, seq)
+        rate = detector.rate_controller.stats(session_id) or {}
+        changed[session_id] = {
+            'seq': seq,
+            'camera_name': session.get('camera_name'),
+            'boxes': detector.tracked_boxes(session),
+            'frame_w': session.get('last_frame_w', 0),
+            'frame_h': session.get('last_frame_h', 0),
+            'fire': bool(session.get('last_fire', False)),
+            'fps': rate.get('avg_fps', 0.0)
+        }
+
+    return jsonify({'seq': cursor, 'active': active, 'sessions': changed})
+
+@stream_bp.route('/detections/stream', methods=['GET'])
+def detections_stream():
+    """Server-Sent Events push of detection changes (replaces polling /api/detections).
+
+    Each event carries the feed sequence number as its id, so the browser's
+    EventSource resumes from Last-Event-ID after a reconnect and only receives
+    the transitions it missed (or a single ``resync`` snapshot if too many).
+    """
+    session_id = request.args.get('session')
+    if not session_id:
+        return jsonify({'error': 'Missing session parameter'}), 400
+
+    session = detector.sessions.get(session_id)
+    if session is None or session.get("state_feed") is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_seq = 0
+
+    feed = session["state_feed"]
+
+    def events():
+        seq = last_seq
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 2000\n\n"
+        while session.get("is_detecting", False) and not feed.closed:
+            pending = feed.wait(seq, timeout=15.0)
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            for event in pending:
+                seq = event["seq"]
+                yield f"id: {seq}\nevent: detections\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @stream_bp.route('/video-feed')
 def video_feed():
     session_id = request.args.get('session')
@@ -193,32 +365,135 @@ def video_feed():
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
-@stream_bp.route('/process-frame', methods=['POST', 'OPTIONS'])
-def process_frame():
-    if request.method == 'OPTIONS':
-        return '', 200
+def handle_browser_fire(username, camera_name, annotated_frame, detections, session_data=None):
+    """Telegram alert + alarm row for a fire detected on a browser/client-submitted frame.
+
+    When the frame was processed without annotation, the overlay is drawn here,
+    only if a notification is actually sent.
+    """
+    import time
+    from datetime import datetime
     
+    # Throttles are per (user, camera) so one camera's alert never suppresses another's
+    camera_state = detector.camera_states.get(username, camera_name)
+    print(f"🔥 FIRE DETECTED in process-frame! Username: {username}")
     try:
-        data = request.get_json()
-        if not data or 'frame' not in data:
-            return jsonify({'error': 'No frame data provided'}), 400
+        from ..services.telegram_notifier import TelegramNotifier
+        
+        notif_settings = notification_cache.get(username)
+        
+        print(f"📋 Notification settings for {username}: {notif_settings}")
         
-        frame_data = data['frame']
-        sensitivity = data.get('sensitivity', 70)
-        username = data.get('username', 'admin')
+        if notif_settings and notif_settings.get('telegram_enabled'):
+            bot_token = notif_settings.get('telegram_bot_token', '')
+            chat_id = notif_settings.get('telegram_chat_id', '')
+            
+            print(f"🔑 Token exists: {bool(bot_token)}, ChatID exists: {bool(chat_id)}")
+            
+            if bot_token and chat_id:
+                now = time.time()
+                time_since = now - camera_state.last_notify_time
+                print(f"⏱️ Time since last notification: {time_since:.1f}s")
+                
+                if time_since > 10:
+                    print("📤 Sending Telegram notification...")
+                    notifier = TelegramNotifier(bot_token, chat_id)
+                    confidence = detections[0].get("confidence", 0) * 100 if detections else 0
+                    message = (
+                        f"🔥 *PERINGATAN KEBAKARAN!*\n\n"
+                        f"📍 Kamera: {camera_name}\n"
+                        f"⏰ Waktu: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                        f"📊 Confidence: {confidence:.1f}%\n\n"
+                        f"Segera lakukan tindakan!"
+                    )
+                    if session_data is not None and not session_data["settings"].get("annotate", True):
+                        annotated_frame = detector.annotate_frame(annotated_frame, session_data, detections)
+                    notifier.send_photo_from_cv2(annotated_frame, caption=message)
+                    camera_state.last_notify_time = now
+                    print(f"✅ Telegram notification sent for process-frame")
+                else:
+                    print(f"⏳ Telegram throttled ({time_since:.1f}s < 10s)")
+            else:
+                print(f"⚠️ Missing token or chat_id")
+        else:
+            print(f"⚠️ Telegram not enabled or no settings found")
+    except Exception as e:
+        print(f"❌ Telegram notification error in process-frame: {e}")
+        import traceback
+        traceback.print_exc()
+    
+    # 💾 Save alarm to database (throttle: 30 seconds)
+    try:
+        import uuid as uuid_module
+        now = time.time()
+        if now - camera_state.last_alarm_save_time > 30:
+            confidence = detections[0].get("confidence", 0) if detections else 0
+            alarm_uuid = str(uuid_module.uuid4())
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            detector.alarm_writer.enqueue((
+                alarm_uuid,
+                timestamp,
+                camera_name,
+                "Default Zone",
+                confidence,
+                "active",
+                ""
+            ), owner=username)
+            camera_state.last_alarm_save_time = now
+            print(f"💾 Alarm queued for database: {alarm_uuid}")
+    except Exception as e:
+        print(f"❌ Error saving alarm in process-frame: {e}")
+
+def read_frame_upload():
+    """Encoded image bytes + parameters of a /api/process-frame request.
+
+    Accepts a raw ``image/jpeg`` (or any ``image/*`` / octet-stream) body with
+    parameters in the query string, ``multipart/form-data`` with a ``frame``
+    file and form fields, or the legacy JSON body with a base64 data URL.
+    """
+    content_type = request.mimetype or ''
+    if content_type.startswith('image/') or content_type == 'application/octet-stream':
+        img_bytes = request.get_data(cache=False)
+        if not img_bytes:
+            raise ValueError('No frame data provided')
+        return img_bytes, request.args
+    if content_type == 'multipart/form-data':
+        upload = request.files.get('frame')
+        if upload is None:
+            raise ValueError('No frame data provided')
+        return upload.read(), request.form
+
+    import base64
+    data = request.get_json(silent=True)
+    if not data or 'frame' not in data:
+        raise ValueError('No frame data provided')
+    frame_data = data['frame']
+    if ',' in frame_data:
+        frame_data = frame_data.split(',')[1]
+    return base64.b64decode(frame_data), data
+
+@stream_bp.route('/process-frame', methods=['POST'])
+@token_required
+def process_frame(current_user):
+    
+    try:
+        try:
+            img_bytes, data = read_frame_upload()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        sensitivity = float(data.get('sensitivity', 70))
+        # The annotated image is not returned, so drawing is skipped unless asked for
+        annotate = str(data.get('annotate', False)).lower() in ('1', 'true')
+        # State, throttles and alarms belong to the authenticated user, never a body field
+        username = current_user
         camera_name = data.get('camera_name', 'Browser Webcam')
         
-        import base64
         import numpy as np
-        import time
-        from datetime import datetime
         
-        if ',' in frame_data:
-            frame_data = frame_data.split(',')[1]
-        
-        img_bytes = base64.b64decode(frame_data)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # frombuffer wraps the upload without copying; imdecode is the only full pass
+        frame = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
         
         if frame is None:
             return jsonify({'error': 'Failed to decode frame'}), 400
@@ -227,108 +502,20 @@ def process_frame():
             if not detector.load_model():
                 return jsonify({'error': 'Failed to load model'}), 500
         
-        # Initialize session_data for single-frame detection
-        # Set consecutive_fire_frames=0 so first fire frame immediately triggers confirmation
-        session_data = {
-            "settings": {"sensitivity": sensitivity},
-            "frame_counter": 0,
-            "consecutive_fire_frames": 0,  # Will become 1 after detection, meeting threshold
-            "fire_confirmed": False
-        }
+        # Temporal state (confirmation counters, tracker) persists per (user, camera)
+        camera_state = detector.camera_states.get(username, camera_name)
+        session_data = camera_state.session_data
+        session_data["settings"]["sensitivity"] = sensitivity
+        session_data["settings"]["annotate"] = annotate
+        if 'confirm_frames' in data:
+            session_data["settings"]["confirm_frames"] = max(1, int(data['confirm_frames']))
         
-        from ..services.detector import detect_fire
-        annotated_frame, fire_detected, detections = detect_fire(frame, session_data)
+        with camera_state.lock:
+            annotated_frame, fire_detected, detections = detector.detect_fire(frame, session_data, alerts=False)
         
-        # 🔔 Send Telegram Notification if fire detected
+        # 🔔 Notify + store alarm if fire detected
         if fire_detected:
-            print(f"🔥 FIRE DETECTED in process-frame! Username: {username}")
-            try:
-                from ..database import get_db_connection
-                from ..services.telegram_notifier import TelegramNotifier
-                
-                conn = get_db_connection()
-                c = conn.cursor(dictionary=True)
-                c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-                notif_settings = c.fetchone()
-                conn.close()
-                
-                print(f"📋 Notification settings for {username}: {notif_settings}")
-                
-                if notif_settings and notif_settings.get('telegram_enabled'):
-                    bot_token = notif_settings.get('telegram_bot_token', '')
-                    chat_id = notif_settings.get('telegram_chat_id', '')
-                    
-                    print(f"🔑 Token exists: {bool(bot_token)}, ChatID exists: {bool(chat_id)}")
-                    
-                    if bot_token and chat_id:
-                        # Throttle using global dict
-                        if not hasattr(process_frame, 'last_notify_time'):
-                            process_frame.last_notify_time = 0
-                        
-                        now = time.time()
-                        time_since = now - process_frame.last_notify_time
-                        print(f"⏱️ Time since last notification: {time_since:.1f}s")
-                        
-                        if time_since > 10:
-                            print("📤 Sending Telegram notification...")
-                            notifier = TelegramNotifier(bot_token, chat_id)
-                            confidence = detections[0].get("confidence", 0) * 100 if detections else 0
-                            message = (
-                                f"🔥 *PERINGATAN KEBAKARAN!*\n\n"
-                                f"📍 Kamera: {camera_name}\n"
-                                f"⏰ Waktu: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                                f"📊 Confidence: {confidence:.1f}%\n\n"
-                                f"Segera lakukan tindakan!"
-                            )
-                            notifier.send_photo_from_cv2(annotated_frame, caption=message)
-                            process_frame.last_notify_time = now
-                            print(f"✅ Telegram notification sent for process-frame")
-                        else:
-                            print(f"⏳ Telegram throttled ({time_since:.1f}s < 10s)")
-                    else:
-                        print(f"⚠️ Missing token or chat_id")
-                else:
-                    print(f"⚠️ Telegram not enabled or no settings found")
-            except Exception as e:
-                print(f"❌ Telegram notification error in process-frame: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            # 💾 Save alarm to database (throttle: 30 seconds)
-            try:
-                import uuid as uuid_module
-                if not hasattr(process_frame, 'last_alarm_save_time'):
-                    process_frame.last_alarm_save_time = 0
-                
-                now = time.time()
-                if now - process_frame.last_alarm_save_time > 30:
-                    from ..database import get_db_connection
-                    conn = get_db_connection()
-                    c = conn.cursor()
-                    
-                    confidence = detections[0].get("confidence", 0) if detections else 0
-                    alarm_uuid = str(uuid_module.uuid4())
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    c.execute("""
-                        INSERT INTO alarms (uuid, timestamp, camera_id, zone, confidence, status, image_path)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        alarm_uuid,
-                        timestamp,
-                        camera_name,
-                        "Default Zone",
-                        confidence,
-                        "active",
-                        ""
-                    ))
-                    
-                    conn.commit()
-                    conn.close()
-                    process_frame.last_alarm_save_time = now
-                    print(f"💾 Alarm saved to database: {alarm_uuid}")
-            except Exception as e:
-                print(f"❌ Error saving alarm in process-frame: {e}")
+            handle_browser_fire(username, camera_name, annotated_frame, detections, session_data)
         
         return jsonify({
             'success': True,
@@ -341,3 +528,135 @@ def process_frame():
     except Exception as e:
         print(f"[PROCESS_FRAME] Error: {e}")
         return jsonify({'error': str(e)}), 500
+
+
+def _capture_time(value, default):
+    """Epoch seconds from a number, numeric string or ISO-8601 timestamp."""
+    if value is None or value == '':
+        return float(default)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        from datetime import datetime
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+def read_batch_upload():
+    """Encoded frames, per-frame metadata and parameters of a /api/process-batch request.
+
+    Either ``multipart/form-data`` with repeated ``frames`` files and a ``meta``
+    field holding a JSON list of {"camera_id", "timestamp"} in the same order,
+    or JSON {"frames": [{"frame": <base64>, "camera_id", "timestamp"}, ...]}.
+    """
+    import base64
+    if request.mimetype == 'multipart/form-data':
+        images = [upload.read() for upload in request.files.getlist('frames')]
+        meta = json.loads(request.form.get('meta') or '[]')
+        params = request.form
+    else:
+        params = request.get_json(silent=True) or {}
+        items = params.get('frames') or []
+        if not isinstance(items, list):
+            raise ValueError('frames must be a list')
+        images = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('frame', ''), str):
+                raise ValueError(f'frame {index} must be an object with a base64 "frame" string')
+            frame_data = item.get('frame', '')
+            if ',' in frame_data:
+                frame_data = frame_data.split(',')[1]
+            images.append(base64.b64decode(frame_data))
+        meta = items
+
+    if not images:
+        raise ValueError('No frames provided')
+    if len(images) > MAX_BATCH_FRAMES:
+        raise ValueError(f'Too many frames (max {MAX_BATCH_FRAMES})')
+    if not isinstance(meta, list) or not all(isinstance(item, dict) for item in meta):
+        raise ValueError('meta must be a list of objects')
+    if len(meta) not in (0, len(images)):
+        raise ValueError('meta must have one entry per frame')
+
+    frames_meta = []
+    for index in range(len(images)):
+        item = meta[index] if meta else {}
+        frames_meta.append({
+            "camera_id": str(item.get('camera_id', 'default')),
+            "timestamp": _capture_time(item.get('timestamp'), index),
+        })
+    return images, frames_meta, params
+
+@stream_bp.route('/process-batch', methods=['POST'])
+@token_required
+def process_batch(current_user):
+    """Run N buffered frames (possibly from several cameras) through the model as one batch.
+
+    Fire confirmation is applied per camera in capture-timestamp order, so
+    consecutive frames of a camera confirm each other exactly as a live stream
+    would. Results are returned in request order.
+    """
+    try:
+        try:
+            images, frames_meta, params = read_batch_upload()
+            sensitivity = float(params.get('sensitivity', 70))
+            confirm_frames = max(1, int(params.get('confirm_frames', 1)))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid batch: {e}'}), 400
+
+        import numpy as np
+
+        frames = []
+        for index, img_bytes in enumerate(images):
+            frame = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                return jsonify({'error': f'Failed to decode frame {index}'}), 400
+            frames.append(frame)
+
+        if detector.model is None:
+            success, msg = detector.load_model()
+            if not success:
+                return jsonify({'error': f'Model Load Failed: {msg}'}), 500
+
+        # One submit so the engine packs the frames into shared forward passes
+        raw_boxes = detector.engine.submit_many(frames, sensitivity / 100.0)
+
+        # Frames of each camera walk its persistent temporal state in capture order
+        order = sorted(range(len(frames)), key=lambda i: (frames_meta[i]["camera_id"], frames_meta[i]["timestamp"], i))
+        results = [None] * len(frames)
+        fired = {}
+        for camera_id, indices in groupby(order, key=lambda i: frames_meta[i]["camera_id"]):
+            indices = list(indices)
+            # Map capture times onto the tracker's monotonic clock, newest frame = now
+            newest = frames_meta[indices[-1]]["timestamp"]
+            clock = time.monotonic()
+            camera_state = detector.camera_states.get(current_user, camera_id)
+            session_data = camera_state.session_data
+            session_data["settings"].update(sensitivity=sensitivity, confirm_frames=confirm_frames, annotate=False)
+            with camera_state.lock:
+                for index in indices:
+                    frame = frames[index]
+                    frame_time = clock - (newest - frames_meta[index]["timestamp"])
+                    _, fire_detected, detections = detector.detect_fire(
+                        frame, session_data, boxes=raw_boxes[index], now=frame_time, alerts=False)
+                    if fire_detected:
+                        fired[camera_id] = (frame, detections, session_data)
+                    results[index] = {
+                        'index': index,
+                        'camera_id': camera_id,
+                        'timestamp': frames_meta[index]["timestamp"],
+                        'fire_detected': fire_detected,
+                        'detections': detections,
+                        'frame_width': frame.shape[1],
+                        'frame_height': frame.shape[0]
+                    }
+
+        # 🔔 One alert per camera, for its latest confirmed frame
+        for camera_id, (frame, detections, session_data) in fired.items():
+            handle_browser_fire(current_user, camera_id, frame, detections, session_data)
+
+        return jsonify({'success': True, 'results': results})
+
+    except Exception as e:
+        print(f"[PROCESS_BATCH] Error: {e}")
+        return jsonify({'error': str(e)}), 500
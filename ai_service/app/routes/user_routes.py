@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from ..utils.decorators import token_required
 from ..database import get_db_connection
 from ..services import detector
+from ..services.settings_cache import notification_cache
 
 user_bp = Blueprint('user', __name__, url_prefix='/api')
 
@@ -73,13 +74,11 @@ def notification_settings_api(current_user):
     if not username:
         return jsonify({'error': 'Username required'}), 400
 
-    conn = get_db_connection()
-    c = conn.cursor(dictionary=True)
-
     if request.method == 'GET':
+        # Served from the cache; a miss loads through its own pooled connection,
+        # so none is held here while waiting for it
         try:
-            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-            settings = c.fetchone()
+            settings = notification_cache.get(username)
             if not settings:
                 # Return defaults
                 settings = {
@@ -92,10 +91,10 @@ def notification_settings_api(current_user):
             return jsonify(settings)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-        finally:
-            conn.close()
 
     elif request.method == 'POST':
+        conn = get_db_connection()
+        c = conn.cursor(dictionary=True)
         try:
             # UPSERT
             sql = """
@@ -127,16 +126,15 @@ def notification_settings_api(current_user):
                 data.get('email_recipient', '')
             )
             c.execute(sql, vals)
+            # Write-through with exactly the row this transaction wrote (a reload could race older loads)
+            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
+            settings = c.fetchone()
             conn.commit()
             
-            # Update active sessions for this user
+            notification_cache.put(username, settings)
             for sid, s in detector.sessions.items():
                 if s.get('owner') == username:
-                    # We need a new cursor for this check or reuse? Better create new.
-                    # Wait, we are already inside a function with connection 'conn'
-                    # Reuse 'conn' for this fetch
-                    c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-                    s['notification_settings'] = c.fetchone()
+                    s['notification_settings'] = settings
                     print(f"🔄 Updated live settings for session {sid}")
 
             return jsonify({'status': 'saved'})
@@ -147,30 +145,6 @@ def notification_settings_api(current_user):
             if conn.is_connected():
                 conn.close()
 
-@user_bp.route('/update-settings', methods=['POST'])
-@token_required
-def update_settings(current_user):
-    data = request.get_json() or {}
-    
-    target_session_id = data.get('session_id')
-    
-    if target_session_id:
-        if target_session_id in detector.sessions:
-            settings = detector.sessions[target_session_id]["settings"]
-            if 'sensitivity' in data: settings['sensitivity'] = data['sensitivity']
-            if 'smoothing' in data: settings['smoothing'] = data['smoothing']
-            if 'noiseReduction' in data: settings['noiseReduction'] = data['noiseReduction']
-            return jsonify({'status': 'updated', 'session_id': target_session_id})
-        else:
-            return jsonify({'error': 'Session not found'}), 404
-    else:
-        for sid in detector.sessions:
-            settings = detector.sessions[sid]["settings"]
-            if 'sensitivity' in data: settings['sensitivity'] = data['sensitivity']
-            if 'smoothing' in data: settings['smoothing'] = data['smoothing']
-            if 'noiseReduction' in data: settings['noiseReduction'] = data['noiseReduction']
-        return jsonify({'status': 'updated_all'})
-
 @user_bp.route('/history', methods=['GET'])
 def get_history():
     try:
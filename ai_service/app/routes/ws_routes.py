@@ -0,0 +1,141 @@
+from flask import Blueprint, request
+import json
+import cv2
+import numpy as np
+from ..utils.decorators import decode_token
+from ..services import detector
+from ..services import ws_protocol as proto
+from .stream_routes import handle_browser_fire
+
+# flask-sock is optional - without it the WebSocket transport is simply not registered
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+    WS_AVAILABLE = True
+except ImportError:
+    Sock = None
+    ConnectionClosed = Exception
+    WS_AVAILABLE = False
+
+ws_bp = Blueprint('ws', __name__, url_prefix='/api')
+
+
+def _class_ids():
+    names = getattr(detector.model, "names", None) or {}
+    return {name: int(idx) for idx, name in names.items()}
+
+
+def _process_channel_frame(channel_state, jpeg, username):
+    """Decode a FRAME payload and run it through the same pipeline as /api/process-frame."""
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Failed to decode frame")
+
+    # Same per-(user, camera) temporal state as /api/process-frame
+    camera_state = detector.camera_states.get(username, channel_state["camera_name"])
+    session_data = camera_state.session_data
+    session_data["settings"].update(sensitivity=channel_state["sensitivity"], annotate=False)
+    with camera_state.lock:
+        annotated_frame, fire_detected, detections = detector.detect_fire(frame, session_data, alerts=False)
+    if fire_detected:
+        handle_browser_fire(username, channel_state["camera_name"], annotated_frame, detections, session_data)
+    return frame.shape[1], frame.shape[0], fire_detected, detections
+
+
+def _push_subscriptions(ws, subscriptions, class_ids):
+    """Send DETECTIONS for every subscribed server session whose results changed."""
+    for channel, sub in subscriptions.items():
+        session = detector.sessions.get(sub["session_id"])
+        if session is None:
+            continue
+        det_seq = session.get("det_seq", 0)
+        if det_seq == sub["det_seq"]:
+            continue
+        sub["det_seq"] = det_seq
+        ws.send(proto.pack_detections(
+            channel, det_seq,
+            session.get("last_frame_w", 0), session.get("last_frame_h", 0),
+            session.get("last_fire", False), detector.tracked_boxes(session), class_ids,
+        ))
+
+
+def ws_handler(ws):
+    """One persistent connection per client, multiplexing browser frames and session pushes."""
+    username = decode_token(request.args.get('token', ''))
+    if not username:
+        ws.send(proto.pack(proto.ERROR, 0, 0, b'Token is invalid!'))
+        return
+
+    if detector.model is None:
+        success, msg = detector.load_model()
+        if not success:
+            ws.send(proto.pack(proto.ERROR, 0, 0, f'Model Load Failed: {msg}'.encode()))
+            return
+
+    class_ids = _class_ids()
+    ws.send(proto.pack(proto.HELLO, 0, 0, json.dumps({"classes": detector.model.names}).encode()))
+
+    channels = {}       # channel -> {"camera_name", "sensitivity"}; temporal state lives in camera_states
+    subscriptions = {}  # channel -> {"session_id", "det_seq"}
+    print(f"🔌 WebSocket client connected: {username}")
+
+    try:
+        while True:
+            message = ws.receive(timeout=0.05)
+            if message is not None:
+                if isinstance(message, str):
+                    ws.send(proto.pack(proto.ERROR, 0, 0, b'Binary messages only'))
+                    continue
+                try:
+                    msg_type, channel, seq, payload = proto.unpack(message)
+                except ValueError as e:
+                    ws.send(proto.pack(proto.ERROR, 0, 0, str(e).encode()))
+                    continue
+
+                state = channels.setdefault(channel, {
+                    "camera_name": f"Browser Webcam {channel}",
+                    "sensitivity": 70,
+                })
+
+                if msg_type == proto.FRAME:
+                    try:
+                        frame_w, frame_h, fire, detections = _process_channel_frame(state, payload, username)
+                        ws.send(proto.pack_detections(channel, seq, frame_w, frame_h, fire, detections, class_ids))
+                    except Exception as e:
+                        ws.send(proto.pack(proto.ERROR, channel, seq, str(e).encode()))
+                elif msg_type == proto.SUBSCRIBE:
+                    session_id = bytes(payload).decode('utf-8', 'replace')
+                    session = detector.sessions.get(session_id)
+                    if session is None or session.get("owner") != username:
+                        ws.send(proto.pack(proto.ERROR, channel, seq, b'Session not found'))
+                    else:
+                        subscriptions[channel] = {"session_id": session_id, "det_seq": -1}
+                elif msg_type == proto.UNSUBSCRIBE:
+                    subscriptions.pop(channel, None)
+                elif msg_type == proto.CONFIG:
+                    try:
+                        config = json.loads(bytes(payload).decode('utf-8'))
+                    except ValueError:
+                        ws.send(proto.pack(proto.ERROR, channel, seq, b'Invalid CONFIG payload'))
+                        continue
+                    if 'camera_name' in config:
+                        state["camera_name"] = str(config['camera_name'])
+                    if 'sensitivity' in config:
+                        state["sensitivity"] = config['sensitivity']
+                else:
+                    ws.send(proto.pack(proto.ERROR, channel, seq, b'Unknown message type'))
+
+            _push_subscriptions(ws, subscriptions, class_ids)
+    except ConnectionClosed:
+        pass
+    finally:
+        print(f"🔌 WebSocket client disconnected: {username}")
+
+
+def register_ws(app):
+    """Register /api/ws when flask-sock is installed."""
+    if not WS_AVAILABLE:
+        print("⚠️ flask-sock not installed - /api/ws WebSocket transport disabled")
+        return
+    Sock().route('/ws', bp=ws_bp)(ws_handler)
+    app.register_blueprint(ws_bp)
@@ -0,0 +1,383 @@
+import atexit
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+ALARM_COLUMNS = ("uuid", "timestamp", "camera_id", "zone", "confidence", "status", "image_path",
+                 "owner", "occurred_at")
+# Columns every alarms table has, used until the owner/occurred_at schema migration ran
+LEGACY_COLUMNS = ALARM_COLUMNS[:7]
+OWNER = ALARM_COLUMNS.index("owner")
+
+# MySQL error numbers the insert recovers from
+ER_BAD_FIELD = 1054          # unknown column: schema not migrated yet
+ER_NO_REFERENCED_ROW = 1452  # owner not in users (e.g. the anonymous "admin" browser user)
+# Server errors that say nothing about the rows: too many connections, lock wait timeout, deadlock
+TRANSIENT_ERRNOS = {1040, 1205, 1213}
+
+
+def is_connection_error(e):
+    """True when the database (not the rows) is the problem, so the batch should be retried later."""
+    if isinstance(e, (ConnectionError, OSError)):
+        return True
+    if type(e).__name__ in ("InterfaceError", "OperationalError", "PoolTimeout"):
+        return True
+    errno = getattr(e, "errno", None)
+    # 2000-2999 are client-side errors (can't connect, server gone away, lost connection)
+    return errno is not None and (2000 <= errno < 3000 or errno in TRANSIENT_ERRNOS)
+
+
+def full_row(row):
+    """Pad a row to ALARM_COLUMNS: older callers and journals only carry the legacy seven values."""
+    row = tuple(row)
+    if len(row) == len(LEGACY_COLUMNS):
+        row += (None,)
+    if len(row) == OWNER + 1:
+        try:
+            occurred_at = datetime.strptime(str(row[1]), '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            occurred_at = datetime.now()
+        row += (occurred_at.strftime('%Y-%m-%d %H:%M:%S'),)
+    return row
+
+
+class AlarmWriter:
+    """Write-behind persistence for alarm rows, off the frame loop.
+
+    ``enqueue`` never touches MySQL: rows go into a bounded in-memory queue and a
+    worker thread inserts them with one multi-row INSERT per batch, flushing when
+    ``batch_size`` rows are queued or the oldest has waited ``flush_interval``
+    seconds. If the database is unreachable (or the queue is full) rows are
+    appended to a JSON-lines journal on disk; the worker replays the journal
+    every ``retry_interval`` seconds until an insert succeeds. A batch the
+    server rejects (bad data rather than an unreachable database) is retried
+    row by row, and rows that still fail go to ``dead_letter_path`` instead of
+    blocking every later alarm.
+    """
+
+    def __init__(self, get_connection, journal_path: str, max_queue: int = 1000,
+                 batch_size: int = 50, flush_interval: float = 1.0, retry_interval: float = 5.0,
+                 dead_letter_path: str = None):
+        self.get_connection = get_connection
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path or journal_path + ".dead"
+        self.max_queue = max(1, int(max_queue))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+
+        self._queue = deque()
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._next_replay = 0.0
+        self._columns = ALARM_COLUMNS
+        self._legacy_until = 0.0
+
+        # Stats (exposed via /api/health)
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.db_up = True
+        self.last_error = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="alarm-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker and flush what is still queued to MySQL (or the journal when it's down)."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        with self._cond:
+            rows = list(self._queue)
+            self._queue.clear()
+            self._oldest = None
+        if rows:
+            unwritten = self._insert(rows) if self.db_up else rows
+            if unwritten:
+                self._spill(unwritten)
+
+    def enqueue(self, row, owner=None):
+        """Queue one alarm row (values in LEGACY_COLUMNS order) for ``owner``. Never blocks on the database."""
+        if not self._running:
+            self.start()
+        row = full_row(tuple(row)[:len(LEGACY_COLUMNS)] + (owner,))
+        with self._cond:
+            if len(self._queue) < self.max_queue:
+                self._queue.append(row)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                if len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+                return True
+        # Queue full (DB far behind): go straight to the journal rather than drop the alarm
+        self._spill([row])
+        return True
+
+    def _take_batch(self):
+        with self._cond:
+            while self._running:
+                if self._queue:
+                    waited = time.monotonic() - self._oldest
+                    if len(self._queue) >= self.batch_size or waited >= self.flush_interval:
+                        break
+                    self._cond.wait(self.flush_interval - waited)
+                else:
+                    self._cond.wait(self.retry_interval)
+                    if not self._queue:
+                        return []
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._oldest = time.monotonic() if self._queue else None
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._take_batch()
+            if batch:
+                # While the DB is known to be down, don't stall on connect timeouts for every batch
+                db_down = not self.db_up and time.monotonic() < self._next_replay
+                unwritten = batch if db_down else self._insert(batch)
+                if unwritten:
+                    self._spill(unwritten)
+            if time.monotonic() >= self._next_replay:
+                self._replay()
+
+    def _insert(self, rows):
+        """One multi-row INSERT + commit. Returns the rows left unwritten because the DB is down."""
+        conn = None
+        pending = list(rows)
+        try:
+            conn = self.get_connection()
+            if conn is None:
+                raise ConnectionError("no database connection")
+            c = conn.cursor()
+            try:
+                self._execute_insert(c, pending)
+                conn.commit()
+                self.written += len(pending)
+                pending = []
+            except Exception as e:
+                if is_connection_error(e):
+                    raise
+                # The server rejected the batch: find the offending row(s) one at a time
+                conn.rollback()
+                print(f"⚠️ Alarm batch rejected ({e}), retrying {len(pending)} row(s) individually")
+                while pending:
+                    row = pending[0]
+                    try:
+                        self._execute_insert(c, [row])
+                        conn.commit()
+                        self.written += 1
+                    except Exception as row_error:
+                        if is_connection_error(row_error):
+                            raise
+                        conn.rollback()
+                        self._dead_letter(row, row_error)
+                    pending.pop(0)
+            self.batches += 1
+            if not self.db_up:
+                print("✅ Alarm DB reachable again")
+            self.db_up = True
+            return []
+        except Exception as e:
+            if self.db_up:
+                print(f"❌ Alarm DB write failed, journaling to {self.journal_path}: {e}")
+            self.db_up = False
+            self.last_error = str(e)
+            self._next_replay = time.monotonic() + self.retry_interval
+            return pending
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _execute_insert(self, c, rows):
+        if self._columns is LEGACY_COLUMNS and time.monotonic() >= self._legacy_until:
+            self._columns = ALARM_COLUMNS  # probe again: the migration may have run meanwhile
+        while True:
+            columns = self._columns
+            placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+            try:
+                c.execute(
+                    f"INSERT INTO alarms ({', '.join(columns)}) VALUES {placeholders}",
+                    [value for row in rows for value in row[:len(columns)]],
+                )
+                return
+            except Exception as e:
+                errno = getattr(e, "errno", None)
+                if errno == ER_BAD_FIELD and columns is ALARM_COLUMNS:
+                    print("⚠️ alarms table has no owner/occurred_at columns yet, writing legacy columns")
+                    self._columns = LEGACY_COLUMNS
+                    self._legacy_until = time.monotonic() + 300
+                elif errno == ER_NO_REFERENCED_ROW and any(row[OWNER] is not None for row in rows):
+                    if len(rows) > 1:
+                        # Find the rows with the unknown owner; the others keep theirs
+                        for row in rows:
+                            self._execute_insert(c, [row])
+                        return
+                    # Keep the alarm, drop the unknown owner
+                    rows = [rows[0][:OWNER] + (None,) + rows[0][OWNER + 1:]]
+                else:
+                    raise
+
+    def _spill(self, rows, count=True):
+        try:
+            with self._journal_lock:
+                directory = os.path.dirname(self.journal_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            if count:
+                self.spilled += len(rows)
+        except Exception as e:
+            print(f"❌ Alarm journal write failed, {len(rows)} alarm(s) lost: {e}")
+
+    def _dead_letter(self, row, error):
+        """Park a row the server keeps rejecting, with the reason, for manual repair."""
+        print(f"❌ Alarm row rejected, moved to {self.dead_letter_path}: {error}")
+        self.last_error = str(error)
+        try:
+            with self._journal_lock:
+                directory = os.path.dirname(self.dead_letter_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"row": list(row), "error": str(error)}, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.dead_lettered += 1
+        except Exception as e:
+            print(f"❌ Alarm dead-letter write failed, alarm lost: {e}")
+
+    @property
+    def replaying_path(self):
+        return self.journal_path + ".replaying"
+
+    def _read_rows(self, path):
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(full_row(json.loads(line)))
+                except ValueError:
+                    pass  # torn write from a crash mid-append
+        return rows
+
+    def _write_rows(self, path, rows):
+        """Atomically replace ``path`` with ``rows`` (write a temp file, fsync, rename)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _replay(self):
+        """Move journaled rows back into MySQL; whatever fails stays in the journal.
+
+        The journal is renamed to ``<journal>.replaying`` rather than deleted, and
+        that file is only trimmed as chunks commit, so a crash mid-replay loses
+        nothing (a chunk committed just before the crash may be written twice).
+        A leftover ``.replaying`` file from such a crash is replayed first.
+        """
+        replaying = self.replaying_path
+        with self._journal_lock:
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.journal_path):
+                    self._next_replay = time.monotonic() + self.retry_interval
+                    return
+                os.replace(self.journal_path, replaying)
+            rows = self._read_rows(replaying)
+
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            unwritten = self._insert(chunk)
+            if unwritten:
+                # Back into the journal (appended under the lock), then drop the replay file
+                self._spill(unwritten + rows[start + self.batch_size:], count=False)
+                with self._journal_lock:
+                    os.remove(replaying)
+                return
+            self.replayed += len(chunk)
+            with self._journal_lock:
+                remaining = rows[start + self.batch_size:]
+                if remaining:
+                    self._write_rows(replaying, remaining)
+                else:
+                    os.remove(replaying)
+        if rows:
+            print(f"💾 Replayed {len(rows)} journaled alarm(s)")
+        self._next_replay = time.monotonic() + self.retry_interval
+
+    def journal_rows(self):
+        total = 0
+        with self._journal_lock:
+            for path in (self.journal_path, self.replaying_path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        total += sum(1 for line in f if line.strip())
+                except FileNotFoundError:
+                    pass
+        return total
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "journal_rows": self.journal_rows(),
+            "db_up": self.db_up,
+            "last_error": self.last_error,
+        }
+
+
+def writer_from_env(get_connection):
+    """Build a writer using ALARM_JOURNAL_PATH / ALARM_DEAD_LETTER_PATH / ALARM_BATCH_SIZE /
+    ALARM_FLUSH_INTERVAL_S / ALARM_QUEUE_SIZE."""
+    return AlarmWriter(
+        get_connection,
+        journal_path=os.getenv("ALARM_JOURNAL_PATH", "alarm_journal.jsonl"),
+        dead_letter_path=os.getenv("ALARM_DEAD_LETTER_PATH"),
+        max_queue=int(os.getenv("ALARM_QUEUE_SIZE", 1000)),
+        batch_size=int(os.getenv("ALARM_BATCH_SIZE", 50)),
+        flush_interval=float(os.getenv("ALARM_FLUSH_INTERVAL_S", 1.0)),
+    )
+
+
+def flush_on_exit(writer):
+    """Stop (and flush) the writer when the process exits, including on SIGTERM (docker stop)."""
+    atexit.register(writer.stop)
+    # Python ignores atexit on an unhandled SIGTERM; turn it into a normal exit instead
+    if threading.current_thread() is threading.main_thread() and \
+            signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
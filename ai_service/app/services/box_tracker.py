@@ -0,0 +1,129 @@
+import time
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+class Track:
+    __slots__ = ("id", "cls", "conf", "box", "vel", "t", "hits", "misses")
+
+    def __init__(self, track_id, box, conf, cls, now):
+        self.id = track_id
+        self.cls = cls
+        self.conf = conf
+        self.box = np.asarray(box, dtype=np.float32)
+        self.vel = np.zeros(4, dtype=np.float32)  # px/s for x1, y1, x2, y2
+        self.t = now
+        self.hits = 1
+        self.misses = 0
+
+    def predict(self, now, max_dt):
+        return self.box + self.vel * min(max(now - self.t, 0.0), max_dt)
+
+
+class BoxTracker:
+    """IoU-association multi-object tracker with an alpha-beta (steady-state Kalman) motion model.
+
+    ``update`` is called with the detections of every inferred frame: detections are
+    greedily matched to the predicted tracks by IoU (same class only), matched tracks
+    are corrected toward the measurement and their velocity re-estimated, unmatched
+    detections start new tracks and tracks unmatched for more than ``max_misses``
+    updates are dropped. ``snapshot`` extrapolates all tracks to the current time so
+    overlays keep moving between inference frames.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 3, alpha: float = 0.6,
+                 beta: float = 0.2, max_extrapolate: float = 1.0):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.alpha = alpha
+        self.beta = beta
+        self.max_extrapolate = max_extrapolate
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, detections, now=None):
+        """Associate detections [(bbox, conf, class_name), ...]; returns the track id of each."""
+        now = time.monotonic() if now is None else now
+        det_boxes = np.array([d[0] for d in detections], dtype=np.float32).reshape(-1, 4)
+        predicted = np.array([t.predict(now, self.max_extrapolate) for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+
+        ious = iou_matrix(predicted, det_boxes)
+        for ti, track in enumerate(self.tracks):
+            for di, det in enumerate(detections):
+                if track.cls != det[2]:
+                    ious[ti, di] = 0.0
+
+        track_ids = [None] * len(detections)
+        matched_tracks = set()
+        while ious.size:
+            ti, di = np.unravel_index(int(ious.argmax()), ious.shape)
+            if ious[ti, di] < self.iou_threshold:
+                break
+            ious[ti, :] = 0.0
+            ious[:, di] = 0.0
+
+            track = self.tracks[ti]
+            dt = now - track.t
+            residual = det_boxes[di] - predicted[ti]
+            track.box = predicted[ti] + self.alpha * residual
+            if dt > 0:
+                track.vel = track.vel + self.beta * residual / dt
+            track.t = now
+            track.conf = detections[di][1]
+            track.hits += 1
+            track.misses = 0
+            matched_tracks.add(ti)
+            track_ids[di] = track.id
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for di, det in enumerate(detections):
+            if track_ids[di] is None:
+                track = Track(self._next_id, det[0], det[1], det[2], now)
+                self._next_id += 1
+                self.tracks.append(track)
+                track_ids[di] = track.id
+        return track_ids
+
+    def snapshot(self, now=None):
+        """Current tracks extrapolated to now, in the detection dict schema."""
+        now = time.monotonic() if now is None else now
+        boxes = []
+        for track in self.tracks:
+            x1, y1, x2, y2 = (int(v) for v in track.predict(now, self.max_extrapolate))
+            boxes.append({
+                "track_id": track.id,
+                "class": track.cls,
+                "confidence": track.conf,
+                "bbox": [x1, y1, x2, y2],
+                "x": x1, "y": y1, "w": x2 - x1, "h": y2 - y1,
+                "hits": track.hits,
+            })
+        return boxes
+
+    def confirmed(self, classes, min_hits: int = 1):
+        """True if a live track of one of classes was matched at least min_hits times."""
+        return any(t.cls.lower() in classes and t.hits >= min_hits for t in self.tracks)
+
+    def reset(self):
+        self.tracks = []
@@ -0,0 +1,93 @@
+import queue
+import threading
+
+
+class Subscriber:
+    """One viewer's bounded queue of encoded frames. When full, the oldest frame is dropped."""
+
+    def __init__(self, maxsize: int = 2):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = 1.0):
+        """Next published item, None on timeout. A closed broadcaster yields its sentinel."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class FrameBroadcaster:
+    """Fan-out of one session's encoded frames to any number of viewers.
+
+    The session producer publishes each frame once; every subscriber gets it
+    through its own bounded queue, so a slow client only drops its own frames
+    and never stalls the producer or the other viewers.
+    """
+
+    CLOSED = object()
+
+    def __init__(self, queue_size: int = 2):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._latest = None
+        self.closed = False
+        self.published = 0
+
+    def subscribe(self):
+        sub = Subscriber(self.queue_size)
+        with self._lock:
+            if self.closed:
+                sub.offer(self.CLOSED)
+                return sub
+            self._subscribers.add(sub)
+            latest = self._latest
+        # New viewers see the last frame immediately instead of waiting for the next one
+        if latest is not None:
+            sub.offer(latest)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, item):
+        with self._lock:
+            self._latest = item
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(item)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for sub in subscribers:
+            sub.offer(self.CLOSED)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "viewers": len(self._subscribers),
+                "published": self.published,
+                "dropped": sum(sub.dropped for sub in self._subscribers),
+            }
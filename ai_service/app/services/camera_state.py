@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+
+
+class CameraState:
+    """Temporal detection state and alert throttles of one (user, camera)."""
+
+    __slots__ = ("session_data", "last_notify_time", "last_alarm_save_time", "last_seen", "lock")
+
+    def __init__(self, session_data):
+        self.session_data = session_data
+        self.last_notify_time = 0.0
+        self.last_alarm_save_time = 0.0
+        self.last_seen = time.monotonic()
+        # Held while a frame runs through detect_fire so concurrent requests
+        # for the same camera don't interleave their counter updates
+        self.lock = threading.Lock()
+
+
+class CameraStateStore:
+    """Server-side state for stateless clients (browser webcams, edge boxes), keyed by (user, camera).
+
+    Entries idle for longer than ``ttl`` seconds are evicted lazily on access,
+    so a camera that stops sending frames starts fresh when it comes back.
+    """
+
+    def __init__(self, factory, ttl: float = 300.0, sweep_interval: float = 30.0):
+        self.factory = factory
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._states = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def get(self, username, camera_name):
+        """The camera's state, created with ``factory()`` on first use (or after eviction)."""
+        now = time.monotonic()
+        key = (username, camera_name)
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            state = self._states.get(key)
+            if state is None or now - state.last_seen > self.ttl:
+                state = CameraState(self.factory())
+                self._states[key] = state
+            state.last_seen = now
+            return state
+
+    def _sweep(self, now):
+        expired = [key for key, state in self._states.items() if now - state.last_seen > self.ttl]
+        for key in expired:
+            del self._states[key]
+        self.evicted += len(expired)
+        self._last_sweep = now
+
+    def stats(self):
+        with self._lock:
+            return {"cameras": len(self._states), "evicted": self.evicted, "ttl_s": self.ttl}
+
+
+def store_from_env(factory):
+    """Build a store whose TTL comes from CAMERA_STATE_TTL_S (seconds, default 300)."""
+    return CameraStateStore(factory, ttl=float(os.getenv("CAMERA_STATE_TTL_S", 300)))
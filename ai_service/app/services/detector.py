@@ -1,11 +1,84 @@
 import cv2
+import numpy as np
 import os
 import time
 import math
 import uuid
 from datetime import datetime
-from ultralytics import YOLO
 from .telegram_notifier import TelegramNotifier
+from .frame_grabber import FrameGrabber
+from .inference_engine import engine_from_env
+from .motion_gate import MotionGate
+from .fire_prefilter import FirePrefilter
+from .box_tracker import BoxTracker
+from .tiling import infer_crops
+from .rate_controller import controller_from_env
+from .broadcaster import FrameBroadcaster
+from .jpeg_cache import JpegCache
+from .state_feed import StateFeed
+from .camera_state import store_from_env
+from .alarm_writer import writer_from_env
+from .onnx_backend import OnnxYoloBackend, export_onnx, onnx_model_path, ONNX_AVAILABLE
+
+# Process every Nth captured frame (skipped frames are grabbed but never decoded)
+DEFAULT_FRAME_SKIP = 3
+
+# Streamed frames are downscaled to this width before annotation/encoding (0 = capture size)
+DEFAULT_STREAM_WIDTH = 640
+
+# Session settings key -> FirePrefilter attribute
+PREFILTER_SETTINGS = {
+    "prefilter_color_min": "color_min",
+    "prefilter_flicker_min": "flicker_min",
+    "prefilter_sat_min": "sat_min",
+    "prefilter_val_min": "val_min",
+}
+
+# Numeric settings accepted from start-detection / update-settings payloads:
+# key -> (type, min, max). Values are coerced and clamped at request time so a
+# bad JSON value is a 400, not a crash in the producer or rate controller later.
+NUMERIC_SETTINGS = {
+    "sensitivity": (float, 0, 100),
+    "frame_skip": (int, 1, None),
+    "confirm_frames": (int, 1, None),
+    "tile_size": (int, 64, None),
+    "tile_overlap": (float, 0.0, 0.9),
+    "ring_size": (int, 1, None),
+    "stream_width": (int, 0, None),
+    "min_fps": (float, 0.1, None),
+    "max_fps": (float, 0.1, None),
+    "motion_threshold": (float, 0.0, 1.0),
+    "motion_refresh_s": (float, 0.0, None),
+    "prefilter_color_min": (float, 0.0, 1.0),
+    "prefilter_flicker_min": (float, 0.0, 1.0),
+    "prefilter_sat_min": (int, 0, 255),
+    "prefilter_val_min": (int, 0, 255),
+}
+# May be null to fall back to the server default
+OPTIONAL_SETTINGS = ("min_fps", "max_fps")
+
+def parse_numeric_settings(data):
+    """Coerced and clamped copies of the NUMERIC_SETTINGS present in data. Raises ValueError."""
+    clean = {}
+    for key, (kind, low, high) in NUMERIC_SETTINGS.items():
+        if key not in data:
+            continue
+        value = data[key]
+        if value is None and key in OPTIONAL_SETTINGS:
+            clean[key] = None
+            continue
+        try:
+            value = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be a number")
+        if not math.isfinite(value):
+            raise ValueError(f"{key} must be a finite number")
+        if low is not None:
+            value = max(kind(low), value)
+        if high is not None:
+            value = min(kind(high), value)
+        clean[key] = value
+    return clean
 
 # Global State
 model = None
@@ -13,34 +86,47 @@ sessions = {}
 last_notification_time = {}
 last_alarm_save_time = {}
 
-def save_alarm_to_db(session_id, session, detections, frame):
-    """Save alarm to database when fire is detected"""
+def save_snapshot(alarm_uuid, snapshot):
+    """Store an alarm snapshot JPEG under ALARM_SNAPSHOT_DIR (disabled when unset)."""
+    snapshot_dir = os.getenv("ALARM_SNAPSHOT_DIR")
+    if not snapshot_dir or not snapshot:
+        return ""
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        path = os.path.join(snapshot_dir, f"{alarm_uuid}.jpg")
+        with open(path, "wb") as f:
+            f.write(snapshot)
+        return path
+    except Exception as e:
+        print(f"❌ Error saving alarm snapshot: {e}")
+        return ""
+
+def _db_connection():
+    from ..database import get_db_connection
+    return get_db_connection()
+
+# Alarm rows are persisted by a background writer so a slow MySQL never stalls the frame loop
+alarm_writer = writer_from_env(_db_connection)
+
+def save_alarm_to_db(session_id, session, detections, frame, snapshot=None):
+    """Queue an alarm row for the background writer when fire is detected"""
     try:
-        from ..database import get_db_connection
-        conn = get_db_connection()
-        c = conn.cursor()
-        
         camera_name = session.get("camera_name", "Camera")
         confidence = detections[0].get("confidence", 0) if detections else 0
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         alarm_uuid = str(uuid.uuid4())
+        image_path = save_snapshot(alarm_uuid, snapshot)
         
-        c.execute("""
-            INSERT INTO alarms (uuid, timestamp, camera_id, zone, confidence, status, image_path)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
+        alarm_writer.enqueue((
             alarm_uuid,
             timestamp,
             camera_name,
             "Default Zone",
             confidence,
             "active",
-            ""
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"💾 Alarm saved to database: {alarm_uuid}")
+            image_path
+        ), owner=session.get("owner"))
+        print(f"💾 Alarm queued for database: {alarm_uuid}")
         return True
     except Exception as e:
         print(f"❌ Error saving alarm to database: {e}")
@@ -54,14 +140,40 @@ def load_model():
     # Check for likely model names - Using ONLY best (13).pt per user request
     possible_names = ['best (13).pt', 'best.pt', 'yolov8n.pt']
     
-    debug_log = f"Base: {base_dir} | "
+    # Inference backend: "torch" (ultralytics/PyTorch), "onnx" (ONNX Runtime CPU)
+    # or "int8" (quantized ONNX produced by quantize_model.py)
+    backend = os.getenv("INFERENCE_BACKEND", "torch").lower()
+    
+    debug_log = f"Base: {base_dir} | Backend: {backend} | "
     
     for name in possible_names:
         model_path = os.path.join(base_dir, name)
         debug_log += f"Checking {name}: "
         
         if os.path.exists(model_path):
+            if backend == "int8":
+                int8_path = os.getenv("INT8_MODEL_PATH") or onnx_model_path(model_path, 640, suffix=".int8")
+                if ONNX_AVAILABLE and os.path.exists(int8_path):
+                    try:
+                        model = OnnxYoloBackend(int8_path)
+                        return True, f"Loaded {os.path.basename(int8_path)} (int8)"
+                    except Exception as e:
+                        debug_log += f"INT8 Exception ({str(e)}), falling back to onnx; "
+                else:
+                    debug_log += f"INT8 model not available ({int8_path}), falling back to onnx; "
+            if backend in ("onnx", "int8"):
+                if ONNX_AVAILABLE:
+                    try:
+                        model = OnnxYoloBackend(export_onnx(model_path, imgsz=640))
+                        return True, f"Loaded {name} (onnx)"
+                    except Exception as e:
+                        debug_log += f"ONNX Exception ({str(e)}), falling back to torch; "
+                        import traceback
+                        traceback.print_exc()
+                else:
+                    debug_log += "onnxruntime not installed, falling back to torch; "
             try:
+                from ultralytics import YOLO
                 model = YOLO(model_path)
                 return True, f"Loaded {name}"
             except Exception as e:
@@ -73,7 +185,53 @@ def load_model():
 
     return False, f"Failed. Log: {debug_log}"
 
-def detect_fire(frame, session_data):
+def predict_batch(frames, conf_threshold):
+    """Run one forward pass over a list of frames.
+
+    Returns one float array of [x1, y1, x2, y2, conf, cls] rows per frame.
+    """
+    if isinstance(model, OnnxYoloBackend):
+        return model.predict(frames, conf_threshold)
+
+    results = model(frames, imgsz=640, conf=conf_threshold, verbose=False)
+    outputs = []
+    for result in results:
+        data = result.boxes.data.cpu().numpy() if result.boxes is not None else None
+        if data is None or len(data) == 0:
+            outputs.append(np.zeros((0, 6), dtype=np.float32))
+        else:
+            outputs.append(data[:, :6])
+    return outputs
+
+# Shared across all sessions and /api/process-frame so frames are batched together
+engine = engine_from_env(predict_batch)
+
+# Adaptive per-session inference rates under a global budget (INFERENCE_BUDGET_FPS)
+rate_controller = controller_from_env()
+
+def new_camera_session():
+    """session_data for a client-fed camera (browser webcam / edge box) in camera_states."""
+    return {
+        "settings": {"sensitivity": 70, "annotate": False, "tracking": True, "confirm_frames": 1},
+        "frame_counter": 0,
+        "consecutive_fire_frames": 0,
+        "fire_confirmed": False,
+        "tracker": BoxTracker(),
+    }
+
+# Temporal state + alert throttles of stateless /api/process-frame clients, per (user, camera)
+camera_states = store_from_env(new_camera_session)
+
+def detect_fire(frame, session_data, boxes=None, now=None, alerts=True):
+    """Detections + temporal fire confirmation for one frame.
+
+    ``boxes`` lets callers that already ran the model (e.g. a batch of uploaded
+    frames) pass the raw [x1, y1, x2, y2, conf, cls] rows and skip inference;
+    ``now`` is the frame's time on the monotonic clock for the tracker
+    (defaults to the current time). ``alerts=False`` skips the session-keyed
+    Telegram/DB block below for client-fed cameras, whose alerts are throttled
+    per (user, camera) by handle_browser_fire.
+    """
     global model
     
     if model is None:
@@ -83,8 +241,24 @@ def detect_fire(frame, session_data):
     sensitivity = session_data["settings"].get("sensitivity", 25)
     conf_threshold = sensitivity / 100.0
     
-    # Run Inference (imgsz=640 matches training/local script)
-    results = model(frame, imgsz=640, conf=conf_threshold, verbose=False)
+    # Motion gate: static scenes reuse the previous detections instead of re-running YOLO
+    gate = session_data.get("motion_gate")
+    prefilter = session_data.get("prefilter")
+    inferred = True
+    if boxes is not None:
+        session_data["last_raw_boxes"] = boxes
+    elif gate is not None and "last_raw_boxes" in session_data and not gate.should_infer(frame):
+        boxes = session_data["last_raw_boxes"]
+        inferred = False
+    elif prefilter is not None and not session_data.get("fire_confirmed") and not prefilter.is_candidate(frame):
+        # Colour/flicker cascade rejected the frame: no fire-like pixels, skip YOLO
+        boxes = np.zeros((0, 6), dtype=np.float32)
+        session_data["last_raw_boxes"] = boxes
+    else:
+        # Run Inference (imgsz=640 matches training/local script) through the shared batch engine.
+        # With ROIs / tiling, only the configured regions are inferred (as one batch of crops).
+        boxes = infer_crops(frame, conf_threshold, session_data["settings"], engine.submit_many)
+        session_data["last_raw_boxes"] = boxes
     
     fire_detected_this_frame = False
     detections = []
@@ -93,45 +267,32 @@ def detect_fire(frame, session_data):
     max_conf_debug = 0.0
     
     # Blink Effect State
-    frame_counter = session_data.get("frame_counter", 0)
-    session_data["frame_counter"] = frame_counter + 1
+    session_data["frame_counter"] = session_data.get("frame_counter", 0) + 1
     
-    for result in results:
-        boxes = result.boxes
-        for box in boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            confidence = float(box.conf[0])
-            if confidence > max_conf_debug: max_conf_debug = confidence
-            
-            class_id = int(box.cls[0])
-            
-            if hasattr(model, "names"):
-                class_name = model.names[class_id]
-            else:
-                class_name = str(class_id)
-            
-            # Simple Fire Filter
-            if class_name.lower() in ['fire', 'smoke']:
-                fire_detected_this_frame = True
-            
-            # Draw Box
-            box_color = (0, 0, 255) if fire_detected_this_frame else (0, 255, 0)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, 2)
-            
-            # Draw Label
-            label = f"{class_name}: {confidence:.1%}"
-            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.6, (255, 255, 255), 2, cv2.LINE_AA)
-            
-            detections.append({
-                "class": class_name,
-                "confidence": confidence,
-                "bbox": [x1, y1, x2, y2],
-                # Normalized coords for frontend
-                "x": x1, "y": y1, "w": x2-x1, "h": y2-y1 # Raw pixels, frontend will scale or use raw
-            })
+    for row in boxes:
+        x1, y1, x2, y2 = int(row[0]), int(row[1]), int(row[2]), int(row[3])
+        
+        confidence = float(row[4])
+        if confidence > max_conf_debug: max_conf_debug = confidence
+        
+        class_id = int(row[5])
+        
+        if hasattr(model, "names"):
+            class_name = model.names[class_id]
+        else:
+            class_name = str(class_id)
+        
+        # Simple Fire Filter
+        if class_name.lower() in ['fire', 'smoke']:
+            fire_detected_this_frame = True
+        
+        detections.append({
+            "class": class_name,
+            "confidence": confidence,
+            "bbox": [x1, y1, x2, y2],
+            # Normalized coords for frontend
+            "x": x1, "y": y1, "w": x2-x1, "h": y2-y1 # Raw pixels, frontend will scale or use raw
+        })
 
     # Sensitivity/Persistence Logic
     consecutive = session_data.get("consecutive_fire_frames", 0)
@@ -143,19 +304,50 @@ def detect_fire(frame, session_data):
     
     session_data["consecutive_fire_frames"] = consecutive
     
+    # Track-level confirmation: a fire/smoke track matched on confirm_frames inferred frames.
+    # Tracks survive a few missed frames, so one dropped detection doesn't clear the alarm.
+    tracker = session_data.get("tracker")
+    confirm_frames = session_data["settings"].get("confirm_frames", 1)
+    if tracker is not None:
+        if inferred:
+            track_ids = tracker.update([(d["bbox"], d["confidence"], d["class"]) for d in detections], now=now)
+            for det, track_id in zip(detections, track_ids):
+                det["track_id"] = track_id
+        else:
+            for det, prev in zip(detections, session_data.get("last_detections", [])):
+                det["track_id"] = prev.get("track_id")
+        session_data["fire_confirmed"] = tracker.confirmed(('fire', 'smoke'), confirm_frames)
     # Reduced from 2 to 1 frame for INSTANT reaction (User Request)
-    if consecutive >= 1:
+    elif consecutive >= confirm_frames:
         session_data["fire_confirmed"] = True
     elif consecutive == 0:
         session_data["fire_confirmed"] = False
+    session_data["last_detections"] = detections
         
     fire_confirmed = session_data.get("fire_confirmed", False)
     
+    session_data["last_max_conf"] = max_conf_debug
+
+    # Drawing is optional: API consumers that only read the structured detections
+    # skip it entirely, and streamed frames are annotated after downscaling.
+    settings = session_data["settings"]
+    serving = session_data.get("jpeg_cache") is not None
+    stream_width = settings.get("stream_width", DEFAULT_STREAM_WIDTH) if serving else 0
+    if settings.get("annotate", True):
+        frame = annotate_frame(frame, session_data, detections, stream_width)
+    elif serving:
+        frame, _ = resize_for_stream(frame, stream_width)
+
+    # Register the fully annotated frame so stream, notifiers and snapshots share one encoding
+    jpeg_cache = session_data.get("jpeg_cache")
+    if jpeg_cache is not None and session_data.get("frame_seq") is not None:
+        jpeg_cache.put_frame(session_data["frame_seq"], frame)
+
     # --- RESTORED ALARM & NOTIFICATION LOGIC ---
     current_time = time.time()
     
-    # 1. Telegram Notification (Rate Limited: 60s)
-    if fire_confirmed:
+    # 4. Telegram Notification (Rate Limited: 60s)
+    if alerts and fire_confirmed:
         last_notif = last_notification_time.get(session_data.get('id', 'default'), 0)
         time_since = current_time - last_notif
         print(f"🔥 FIRE DETECTED! Time since last notif: {time_since:.1f}s")
@@ -170,12 +362,13 @@ def detect_fire(frame, session_data):
             
             if telegram_enabled and bot_token and chat_id:
                 import threading
+                photo = frame_jpeg(session_data, frame, 85)
                 def send_telegram():
                     try:
                         notifier = TelegramNotifier(bot_token, chat_id)
                         camera_name = session_data.get("camera_name", "Camera")
                         message = f"🔥 FireVision Alert ({camera_name}) — Api terdeteksi!"
-                        notifier.send_photo_from_cv2(frame.copy(), caption=message)
+                        notifier.send_photo(photo, caption=message)
                         print("✅ Telegram sent successfully")
                     except Exception as e:
                         print(f"❌ Telegram Error: {e}")
@@ -189,19 +382,98 @@ def detect_fire(frame, session_data):
             else:
                 print(f"⚠️ Telegram not configured: enabled={telegram_enabled}, token={bool(bot_token)}, chat_id={bool(chat_id)}")
 
-    # 2. Save to Database (Rate Limited: 10s)
-    if fire_confirmed:
+    # 5. Save to Database (Rate Limited: 10s)
+    if alerts and fire_confirmed:
         last_save = last_alarm_save_time.get(session_data.get('id', 'default'), 0)
         if current_time - last_save > 10:
             print("💾 Attempting to save alarm to DB...")
-            saved = save_alarm_to_db(session_data.get('id'), session_data, detections, frame)
+            saved = save_alarm_to_db(session_data.get('id'), session_data, detections, frame,
+                                     snapshot=frame_jpeg(session_data, frame, 85))
             if saved:
                 print("✅ Alarm Saved to DB")
                 last_alarm_save_time[session_data.get('id', 'default')] = current_time
             else:
                 print("❌ Failed to save alarm to DB")
 
-    # 3. Status Bar Overlay & Timestamp
+    return frame, fire_confirmed, detections
+
+def create_motion_gate(settings):
+    """Build the session's MotionGate from its settings (None when disabled)."""
+    if not settings.get("motion_gate", True):
+        return None
+    return MotionGate(
+        threshold=float(settings.get("motion_threshold", 0.005)),
+        refresh_interval=float(settings.get("motion_refresh_s", 5.0)),
+    )
+
+def apply_motion_settings(session, data):
+    """Apply motion_gate / motion_threshold / motion_refresh_s from an update-settings payload."""
+    settings = session["settings"]
+    for key in ("motion_gate", "motion_threshold", "motion_refresh_s"):
+        if key in data:
+            settings[key] = data[key]
+
+    if "motion_gate" in data:
+        session["motion_gate"] = create_motion_gate(settings)
+    elif session.get("motion_gate") is not None:
+        session["motion_gate"].update(data.get("motion_threshold"), data.get("motion_refresh_s"))
+
+def create_prefilter(settings):
+    """Build the session's colour/flicker FirePrefilter (None unless enabled)."""
+    if not settings.get("prefilter", False):
+        return None
+    return FirePrefilter(**{
+        attr: settings[key] for key, attr in PREFILTER_SETTINGS.items() if settings.get(key) is not None
+    })
+
+def apply_prefilter_settings(session, data):
+    """Apply prefilter / prefilter_* thresholds from an update-settings payload."""
+    settings = session["settings"]
+    for key in ("prefilter", *PREFILTER_SETTINGS):
+        if key in data:
+            settings[key] = data[key]
+
+    if "prefilter" in data:
+        session["prefilter"] = create_prefilter(settings)
+    elif session.get("prefilter") is not None:
+        session["prefilter"].update(**{attr: data.get(key) for key, attr in PREFILTER_SETTINGS.items()})
+
+def create_tracker(settings):
+    """Build the session's BoxTracker (None when tracking is disabled)."""
+    if not settings.get("tracking", True):
+        return None
+    return BoxTracker()
+
+def tracked_boxes(session):
+    """Boxes for /api/detections: tracks extrapolated to now, or the last raw detections."""
+    tracker = session.get("tracker")
+    if tracker is not None:
+        return tracker.snapshot()
+    return session.get("last_boxes", [])
+
+def resize_for_stream(frame, width):
+    """Downscale frame to width (keeping aspect); returns (frame, scale). No-op when already narrower."""
+    if not width or frame.shape[1] <= width:
+        return frame, 1.0
+    scale = width / frame.shape[1]
+    return cv2.resize(frame, (width, round(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA), scale
+
+def draw_boxes(frame, boxes, scale=1.0):
+    """Draw detection/track boxes (no status overlay); bbox coords are scaled to the frame."""
+    for box in boxes:
+        x1, y1, x2, y2 = (int(v * scale) for v in box["bbox"])
+        color = (0, 0, 255) if box["class"].lower() in ['fire', 'smoke'] else (0, 255, 0)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, f"{box['class']}: {box['confidence']:.1%}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+def annotate_frame(frame, session_data, detections, width=0):
+    """Boxes, timestamp, fire status (flashing border) and debug line, drawn at stream resolution."""
+    frame, scale = resize_for_stream(frame, width)
+    draw_boxes(frame, detections, scale)
+
+    fire_confirmed = session_data.get("fire_confirmed", False)
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     cv2.putText(frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 
                 0.7, (255, 255, 255), 2, cv2.LINE_AA)
@@ -211,7 +483,7 @@ def detect_fire(frame, session_data):
         status_color = (0, 0, 255) # Red
         
         # Flashing Border
-        if (frame_counter // 5) % 2 == 0:
+        if (session_data.get("frame_counter", 0) // 5) % 2 == 0:
              cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), (0, 0, 255), 10)
     else:
         status_text = "Monitoring..."
@@ -221,47 +493,184 @@ def detect_fire(frame, session_data):
                 1.0, status_color, 2, cv2.LINE_AA)
 
     # DEBUG OVERLAY
-    debug_color = (0, 255, 255)
-    debug_text = f"MAX CONF: {max_conf_debug:.2f} (Thresh: {conf_threshold:.2f})"
+    conf_threshold = session_data["settings"].get("sensitivity", 25) / 100.0
+    debug_text = f"MAX CONF: {session_data.get('last_max_conf', 0.0):.2f} (Thresh: {conf_threshold:.2f})"
     cv2.putText(frame, debug_text, (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 
-                0.7, debug_color, 2, cv2.LINE_AA)
+                0.7, (0, 255, 255), 2, cv2.LINE_AA)
+    return frame
 
-    return frame, fire_confirmed, detections
+def encode_jpeg(frame, quality=60):
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+def frame_jpeg(session_data, frame, quality):
+    """JPEG of the session's current frame from its encode-once cache (direct encode without one)."""
+    jpeg_cache = session_data.get("jpeg_cache")
+    seq = session_data.get("frame_seq")
+    if jpeg_cache is not None and seq is not None:
+        data = jpeg_cache.get(seq, quality)
+        if data is not None:
+            return data
+    return encode_jpeg(frame, quality)
+
+def mjpeg_part(frame_bytes):
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+def publish_state(session_id, session):
+    """Record the session's detection state in its StateFeed; only actual changes become events."""
+    feed = session.get("state_feed")
+    if feed is None:
+        return None
+    boxes = tracked_boxes(session)
+    fire = bool(session.get("last_fire", False))
+    # Quantize to ~16px so jitter from the tracker does not count as a change
+    signature = (fire, frozenset(
+        (b.get("track_id") or b["class"], tuple(int(v) // 16 for v in b["bbox"])) for b in boxes
+    ))
+    return feed.update(signature, {
+        "session_id": session_id,
+        "boxes": boxes,
+        "frame_w": session.get("last_frame_w", 0),
+        "frame_h": session.get("last_frame_h", 0),
+        "fire": fire,
+    })
+
+def session_stats(session_id, session):
+    """Per-session pipeline stats reported by /api/health."""
+    gate = session.get("motion_gate")
+    prefilter = session.get("prefilter")
+    return {
+        "camera_name": session.get("camera_name"),
+        "rate": rate_controller.stats(session_id),
+        "stream": session["broadcaster"].stats() if session.get("broadcaster") is not None else None,
+        "jpeg_cache": session["jpeg_cache"].stats() if session.get("jpeg_cache") is not None else None,
+        "motion_gate": gate.stats() if gate is not None else None,
+        "prefilter": prefilter.stats() if prefilter is not None else None,
+        "tracks": len(session["tracker"].tracks) if session.get("tracker") is not None else None,
+        "state_seq": session["state_feed"].seq if session.get("state_feed") is not None else None,
+    }
+
+def ensure_grabber(session_id, session):
+    """Return the session's running FrameGrabber, starting one if needed."""
+    grabber = session.get("grabber")
+    if grabber is None or not grabber.is_running:
+        camera = session.get("camera")
+        if camera is None or not camera.isOpened():
+            return None
+        frame_skip = session.get("settings", {}).get("frame_skip", DEFAULT_FRAME_SKIP)
+        grabber = FrameGrabber(camera, name=session.get("camera_name", session_id), frame_skip=frame_skip).start()
+        session["grabber"] = grabber
+    return grabber
+
+def set_frame_skip(session, frame_skip):
+    """Update a session's skip ratio; applies to the running grabber immediately."""
+    try:
+        frame_skip = max(1, int(frame_skip))
+    except (TypeError, ValueError):
+        return False
+    session["settings"]["frame_skip"] = frame_skip
+    grabber = session.get("grabber")
+    if grabber is not None:
+        grabber.frame_skip = frame_skip
+    return True
+
+def stop_session_capture(session):
+    """Stop the background grabber (if any) and release the camera handle."""
+    grabber = session.get("grabber")
+    if grabber is not None:
+        grabber.stop(release=True)
+        session["grabber"] = None
+    elif session.get("camera"):
+        session["camera"].release()
+
+def ensure_producer(session_id, session):
+    """Start the session's single capture/inference/encode producer if it isn't running."""
+    import threading
+    if session.get("broadcaster") is None:
+        session["broadcaster"] = FrameBroadcaster()
+    producer = session.get("producer")
+    if producer is None or not producer.is_alive():
+        producer = threading.Thread(target=run_session, args=(session_id,), name=f"producer-{session_id[:8]}", daemon=True)
+        session["producer"] = producer
+        producer.start()
+    return session["broadcaster"]
 
 def generate_frames(session_id):
-    global sessions
-    
+    """MJPEG generator for one viewer: subscribes to the session's broadcaster."""
     if session_id not in sessions:
         print(f"❌ Session {session_id} not found in generate_frames")
         return
 
     session = sessions[session_id]
+    broadcaster = ensure_producer(session_id, session)
+    subscriber = broadcaster.subscribe()
+    print(f"👀 Viewer joined session {session_id} ({broadcaster.subscriber_count} watching)")
+
+    try:
+        while session.get("is_detecting", False):
+            frame_bytes = subscriber.get(timeout=1.0)
+            if frame_bytes is None:
+                continue
+            if frame_bytes is FrameBroadcaster.CLOSED:
+                break
+            yield mjpeg_part(frame_bytes)
+    finally:
+        broadcaster.unsubscribe(subscriber)
+        print(f"👋 Viewer left session {session_id}")
+
+def run_session(session_id):
+    """Producer loop: capture, infer and JPEG-encode each frame once, then publish to all viewers."""
+    if session_id not in sessions:
+        print(f"❌ Session {session_id} not found in run_session")
+        return
+
+    session = sessions[session_id]
+    broadcaster = session["broadcaster"]
+    if session.get("jpeg_cache") is None:
+        session["jpeg_cache"] = JpegCache(session.get("settings", {}).get("ring_size", 8))
+    jpeg_cache = session["jpeg_cache"]
     print(f"🎥 Starting stream loop for session: {session_id}")
 
+    grabber = ensure_grabber(session_id, session)
+    if grabber is None:
+        print("Camera disconnected or invalid.")
+        return
+    last_seq = 0
+    settings = session.get("settings", {})
+    rate_controller.register(session_id, settings.get("min_fps"), settings.get("max_fps"))
+
     try:
         while session.get("is_detecting", False):
-            camera = session.get("camera")
-            if camera is None or not camera.isOpened():
+            if not grabber.is_running:
                 print("Camera disconnected or invalid.")
                 break
 
-            success, frame = camera.read()
-            # Skip frames for performance (process every 3rd frame)
-            session['frame_counter'] = session.get('frame_counter', 0) + 1
-            if session['frame_counter'] % 3 != 0:
+            # Always take the newest decoded frame from the grabber slot; the grabber
+            # already skips (grab-only) frames according to settings["frame_skip"].
+            seq, frame = grabber.wait_for_frame(last_seq, timeout=1.0)
+            if frame is None:
                 continue
+            last_seq = seq
+            session['frame_counter'] = session.get('frame_counter', 0) + 1
+            session['frame_seq'] = seq
 
-            if not success:
-                # Loop video if file/demo, or retry if IP cam?
-                # For now just wait and retry
-                time.sleep(0.1)
-                continue
-                
             # If frame too big, resize for performance?
             #frame = cv2.resize(frame, (640, 480))
 
+            # Between this camera's inference slots: stream the fresh frame with tracked boxes
+            if not rate_controller.try_acquire(session_id):
+                stream_frame, scale = resize_for_stream(frame, settings.get("stream_width", DEFAULT_STREAM_WIDTH))
+                if settings.get("annotate", True):
+                    draw_boxes(stream_frame, tracked_boxes(session), scale)
+                jpeg_cache.put_frame(seq, stream_frame)
+                broadcaster.publish(jpeg_cache.get(seq, 60))
+                continue
+
             # Detect
             annotated_frame, fire_detected, detections = detect_fire(frame, session)
+            rate_controller.observe(session_id, bool(detections),
+                                    max((d["confidence"] for d in detections), default=0.0))
             
             # 🔔 Send Telegram Notification if fire detected
             if fire_detected:
@@ -287,7 +696,7 @@ def generate_frames(session_id):
                                 f"📊 Confidence: {confidence:.1f}%\n\n"
                                 f"Segera lakukan tindakan!"
                             )
-                            notifier.send_photo_from_cv2(annotated_frame, caption=message)
+                            notifier.send_photo(frame_jpeg(session, annotated_frame, 85), caption=message)
                             last_notification_time[session_id] = now
                             print(f"📲 Telegram notification sent for session {session_id}")
                         except Exception as e:
@@ -297,25 +706,27 @@ def generate_frames(session_id):
                 now = time.time()
                 last_saved = last_alarm_save_time.get(session_id, 0)
                 if now - last_saved > 30:
-                    save_alarm_to_db(session_id, session, detections, annotated_frame)
+                    save_alarm_to_db(session_id, session, detections, annotated_frame,
+                                     snapshot=frame_jpeg(session, annotated_frame, 85))
                     last_alarm_save_time[session_id] = now
             
             # Update Session State (for polling API)
             session["last_boxes"] = detections
             session["last_frame_w"] = frame.shape[1]
             session["last_frame_h"] = frame.shape[0]
+            session["last_fire"] = fire_detected
+            # Bumped on every inference so push transports can tell when results changed
+            session["det_seq"] = session.get("det_seq", 0) + 1
+            publish_state(session_id, session)
             # Ideally /api/detections should read from session["last_boxes"]
             # We need to verify stream_routes uses this.
             
             # Note: stream_routes endpoint for detections isn't shown in my view_file key checks
             # But assuming it reads session["last_boxes"]
             
-            # Encode
-            ret, buffer = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            frame_bytes = buffer.tobytes()
-
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            # Encode once for every viewer (reuses the cached encoding when one exists)
+            jpeg_cache.put_frame(seq, annotated_frame)
+            broadcaster.publish(jpeg_cache.get(seq, 60))
                    
             # Limit FPS to ~30
             # time.sleep(0.01) 
@@ -324,5 +735,8 @@ def generate_frames(session_id):
         print(f"Stream error: {e}")
     finally:
         print(f"Stream ended for {session_id}")
-        if session.get("camera"):
-            session["camera"].release()
+        rate_controller.unregister(session_id)
+        broadcaster.close()
+        if session.get("state_feed") is not None:
+            session["state_feed"].close()
+        stop_session_capture(session)
@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+
+
+class FirePrefilter:
+    """First cascade stage: vectorized HSV colour + temporal flicker test ahead of YOLO.
+
+    Frames are downscaled to ``width`` px. A pixel is fire-coloured when it is
+    red/orange/yellow in HSV, saturated and bright, and satisfies R >= G > B.
+    Flicker is the share of those pixels whose brightness changed by more than
+    ``flicker_delta`` since the previous frame. A frame is a candidate when enough
+    pixels are fire-coloured and enough of them flicker; only candidates are sent
+    to YOLO. After a candidate the next ``hold_frames`` frames pass unconditionally
+    so confirmation logic sees a continuous sequence.
+    """
+
+    def __init__(self, color_min: float = 0.0005, flicker_min: float = 0.05, sat_min: int = 80,
+                 val_min: int = 150, flicker_delta: int = 20, hold_frames: int = 10, width: int = 160):
+        self.color_min = color_min
+        self.flicker_min = flicker_min
+        self.sat_min = sat_min
+        self.val_min = val_min
+        self.flicker_delta = flicker_delta
+        self.hold_frames = hold_frames
+        self.width = width
+
+        self._prev_val = None
+        self._hold = 0
+
+        # Stats
+        self.checked = 0
+        self.rejected = 0
+        self.last_color = 0.0
+        self.last_flicker = 0.0
+        self.last_region = None
+
+    def score(self, frame):
+        """Return (color_ratio, flicker_ratio, region) for a BGR frame; region is in full-frame pixels."""
+        h, w = frame.shape[:2]
+        scale = self.width / w
+        small = cv2.resize(frame, (self.width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        hue, sat, val = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+        b, g, r = small[:, :, 0], small[:, :, 1], small[:, :, 2]
+
+        mask = ((hue <= 35) | (hue >= 170)) & (sat >= self.sat_min) & (val >= self.val_min) & (r >= g) & (g > b)
+        color_pixels = int(np.count_nonzero(mask))
+        color_ratio = color_pixels / mask.size
+
+        flicker_ratio = 0.0
+        prev = self._prev_val
+        if prev is not None and prev.shape == val.shape and color_pixels:
+            changed = np.abs(val.astype(np.int16) - prev.astype(np.int16)) > self.flicker_delta
+            flicker_ratio = np.count_nonzero(changed & mask) / color_pixels
+        self._prev_val = val
+
+        region = None
+        if color_pixels:
+            ys, xs = np.nonzero(mask)
+            region = [int(xs.min() / scale), int(ys.min() / scale), int((xs.max() + 1) / scale), int((ys.max() + 1) / scale)]
+        return color_ratio, flicker_ratio, region
+
+    def is_candidate(self, frame):
+        self.checked += 1
+        color_ratio, flicker_ratio, region = self.score(frame)
+        self.last_color, self.last_flicker, self.last_region = color_ratio, flicker_ratio, region
+
+        if color_ratio >= self.color_min and flicker_ratio >= self.flicker_min:
+            self._hold = self.hold_frames
+            return True
+        if self._hold > 0:
+            self._hold -= 1
+            return True
+
+        self.rejected += 1
+        return False
+
+    def update(self, **thresholds):
+        for key, value in thresholds.items():
+            if value is not None and hasattr(self, key):
+                setattr(self, key, type(getattr(self, key))(value))
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "reject_rate": round(self.rejected / self.checked, 3) if self.checked else 0.0,
+            "last_color": round(self.last_color, 4),
+            "last_flicker": round(self.last_flicker, 4),
+        }
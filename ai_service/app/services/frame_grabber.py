@@ -0,0 +1,120 @@
+import threading
+import time
+
+
+class FrameGrabber:
+    """Drains a cv2.VideoCapture on a background thread, keeping only the newest frame.
+
+    RTSP/IP cameras buffer frames inside OpenCV when the consumer is slower than
+    the stream, so reading inline from the inference loop returns stale frames.
+    The grabber reads continuously and overwrites a single slot; consumers always
+    get the latest frame, which bounds latency to one inference period.
+
+    Frames are advanced with grab() and only every ``frame_skip``-th one is
+    retrieve()d (decoded), so skipped frames never pay the decode cost.
+
+    The capture is only released once nothing reads from it: by ``stop`` if the
+    grab thread has exited, otherwise by the grab thread itself when its loop
+    ends (OpenCV captures are not safe to release during a grab()).
+    """
+
+    def __init__(self, camera, name: str = "camera", retry_delay: float = 0.1, frame_skip: int = 1):
+        self.camera = camera
+        self.name = name
+        self.retry_delay = retry_delay
+        self.frame_skip = max(1, int(frame_skip))
+        self.grabbed = 0
+        self.decoded = 0
+
+        self._frame = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._exited = False
+        self._release_on_exit = False
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._exited = False
+        self._thread = threading.Thread(target=self._run, name=f"grabber-{self.name}", daemon=True)
+        self._thread.start()
+        print(f"📷 Frame grabber started for {self.name}")
+        return self
+
+    def _run(self):
+        while self._running:
+            camera = self.camera
+            if camera is None or not camera.isOpened():
+                print(f"Camera disconnected for grabber {self.name}.")
+                break
+
+            if not camera.grab():
+                time.sleep(self.retry_delay)
+                continue
+            self.grabbed += 1
+            if self.grabbed % self.frame_skip != 0:
+                continue
+
+            success, frame = camera.retrieve()
+            if not success:
+                continue
+            self.decoded += 1
+
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._exited = True
+            release = self._release_on_exit
+            self._cond.notify_all()
+        if release:
+            self._release_camera()
+
+    def _release_camera(self):
+        if self.camera is not None:
+            self.camera.release()
+
+    @property
+    def is_running(self):
+        return self._running
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def latest(self):
+        """Return (seq, frame) for the newest frame without waiting."""
+        with self._cond:
+            return self._seq, self._frame
+
+    def wait_for_frame(self, last_seq: int = 0, timeout: float = 1.0):
+        """Block until a frame newer than last_seq is available.
+
+        Returns (seq, frame); frame is None if the timeout expired or the grabber stopped.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq or not self._running, timeout=timeout)
+            if self._seq > last_seq:
+                return self._seq, self._frame
+            return last_seq, None
+
+    def stop(self, release: bool = True):
+        with self._cond:
+            self._running = False
+            # Hand the release to the grab thread unless it is already gone
+            thread_done = self._thread is None or self._exited
+            self._release_on_exit = release and not thread_done
+            self._cond.notify_all()
+        if release and thread_done:
+            self._release_camera()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+            if self._thread.is_alive():
+                print(f"⚠️ Grabber {self.name} still in grab(); it releases the camera when that returns")
+        print(f"🛑 Frame grabber stopped for {self.name}")
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class _PendingFrame:
+    __slots__ = ("frame", "conf", "event", "result", "error")
+
+    def __init__(self, frame, conf):
+        self.frame = frame
+        self.conf = conf
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceEngine:
+    """Central scheduler that micro-batches frames from every session into one forward pass.
+
+    Callers (stream loops, /api/process-frame) submit a single frame and block until
+    its detections are ready. A worker thread collects pending frames until either
+    ``batch_size`` frames are queued or the oldest one has waited ``max_wait_ms``,
+    then runs ``predict_fn(frames, conf)`` once and routes each result back.
+
+    ``predict_fn`` must return one array of ``[x1, y1, x2, y2, conf, cls]`` rows per
+    frame. The batch runs at the lowest confidence requested and each caller's own
+    threshold is re-applied afterwards, so sessions with different sensitivity can
+    share a batch.
+    """
+
+    def __init__(self, predict_fn, batch_size: int = 8, max_wait_ms: float = 15.0):
+        self.predict_fn = predict_fn
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # Stats (exposed via /api/health)
+        self.batches = 0
+        self.frames = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+        self._thread.start()
+        print(f"🧠 Inference engine started (batch_size={self.batch_size}, max_wait={self.max_wait * 1000:.0f}ms)")
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def submit(self, frame, conf: float, timeout: float = 10.0):
+        """Queue one frame and wait for its detections (array of [x1, y1, x2, y2, conf, cls])."""
+        if self.batch_size <= 1:
+            return self.predict_fn([frame], conf)[0]
+
+        if not self._running:
+            self.start()
+
+        pending = _PendingFrame(frame, conf)
+        with self._cond:
+            self._queue.append(pending)
+            self._cond.notify_all()
+
+        if not pending.event.wait(timeout):
+            raise TimeoutError("Inference engine did not answer in time")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def submit_many(self, frames, conf: float, timeout: float = 10.0):
+        """Queue several frames (e.g. tiles of one camera frame) so they share a batch."""
+        if self.batch_size <= 1 or len(frames) == 1:
+            if len(frames) == 1:
+                return [self.submit(frames[0], conf, timeout)]
+            return self.predict_fn(frames, conf)
+
+        if not self._running:
+            self.start()
+
+        pending = [_PendingFrame(frame, conf) for frame in frames]
+        with self._cond:
+            self._queue.extend(pending)
+            self._cond.notify_all()
+
+        results = []
+        for p in pending:
+            if not p.event.wait(timeout):
+                raise TimeoutError("Inference engine did not answer in time")
+            if p.error is not None:
+                raise p.error
+            results.append(p.result)
+        return results
+
+    def _collect_batch(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or not self._running)
+            if not self._running:
+                return []
+
+            # Wait for more frames until the batch is full or the oldest frame's deadline passes
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                min_conf = min(p.conf for p in batch)
+                outputs = self.predict_fn([p.frame for p in batch], min_conf)
+                for pending, boxes in zip(batch, outputs):
+                    if pending.conf > min_conf and len(boxes):
+                        boxes = boxes[boxes[:, 4] >= pending.conf]
+                    pending.result = boxes
+            except Exception as e:
+                print(f"❌ Inference batch failed: {e}")
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.event.set()
+
+            self.batches += 1
+            self.frames += len(batch)
+            self.last_batch_size = len(batch)
+            self.last_batch_ms = (time.perf_counter() - started) * 1000.0
+
+    def stats(self):
+        return {
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": (self.frames / self.batches) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 1),
+            "queued": len(self._queue),
+        }
+
+
+def engine_from_env(predict_fn):
+    """Build an engine using INFERENCE_BATCH_SIZE / INFERENCE_MAX_WAIT_MS."""
+    return InferenceEngine(
+        predict_fn,
+        batch_size=int(os.getenv("INFERENCE_BATCH_SIZE", 8)),
+        max_wait_ms=float(os.getenv("INFERENCE_MAX_WAIT_MS", 15)),
+    )
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+import cv2
+
+
+class JpegCache:
+    """Encode-once JPEG buffers for a session's recent frames, keyed by (frame seq, quality).
+
+    The producer registers each annotated frame under its sequence number; the
+    MJPEG stream, notifiers and alarm snapshots then ask for the quality they
+    need and share a single encoding per (seq, quality). Only the last
+    ``ring_size`` frames are kept - older frames and their encodings are evicted.
+    """
+
+    def __init__(self, ring_size: int = 8):
+        self.ring_size = max(1, int(ring_size))
+        self._frames = OrderedDict()   # seq -> annotated BGR frame
+        self._encoded = {}             # (seq, quality) -> JPEG bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put_frame(self, seq, frame):
+        with self._lock:
+            self._frames[seq] = frame
+            self._frames.move_to_end(seq)
+            while len(self._frames) > self.ring_size:
+                old_seq, _ = self._frames.popitem(last=False)
+                for key in [k for k in self._encoded if k[0] == old_seq]:
+                    del self._encoded[key]
+
+    def get(self, seq, quality: int = 60):
+        """JPEG bytes of frame seq at quality, encoding it on first request. None if evicted."""
+        key = (seq, quality)
+        with self._lock:
+            data = self._encoded.get(key)
+            if data is not None:
+                self.hits += 1
+                return data
+            frame = self._frames.get(seq)
+            if frame is None:
+                return None
+            self.misses += 1
+
+        ok, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if not ok:
+            return None
+        data = buffer.tobytes()
+        with self._lock:
+            if seq in self._frames:
+                self._encoded[key] = data
+        return data
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "frames": len(self._frames),
+            "encodings": len(self._encoded),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,69 @@
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap pre-stage that decides whether a frame changed enough to need inference.
+
+    Frames are downscaled to ``width`` px grayscale and compared against the last
+    frame that was actually inferred. If fewer than ``threshold`` of the pixels
+    changed by more than ``pixel_delta`` the caller reuses its previous detections.
+    A forced refresh every ``refresh_interval`` seconds guarantees that a slowly
+    growing fire (below the per-frame threshold) is still re-inferred.
+    """
+
+    def __init__(self, threshold: float = 0.005, pixel_delta: int = 25, refresh_interval: float = 5.0, width: int = 160):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.refresh_interval = refresh_interval
+        self.width = width
+
+        self._reference = None
+        self._last_infer = 0.0
+
+        # Stats
+        self.checked = 0
+        self.skipped = 0
+        self.last_change = 0.0
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_infer(self, frame):
+        self.checked += 1
+        gray = self._prepare(frame)
+        now = time.monotonic()
+
+        ref = self._reference
+        if ref is not None and ref.shape == gray.shape and now - self._last_infer < self.refresh_interval:
+            diff = cv2.absdiff(gray, ref)
+            self.last_change = np.count_nonzero(diff > self.pixel_delta) / diff.size
+            if self.last_change < self.threshold:
+                self.skipped += 1
+                return False
+
+        self._reference = gray
+        self._last_infer = now
+        return True
+
+    def reset(self):
+        self._reference = None
+
+    def update(self, threshold=None, refresh_interval=None):
+        if threshold is not None:
+            self.threshold = float(threshold)
+        if refresh_interval is not None:
+            self.refresh_interval = float(refresh_interval)
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / self.checked, 3) if self.checked else 0.0,
+            "last_change": round(self.last_change, 4),
+        }
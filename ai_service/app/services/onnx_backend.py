@@ -0,0 +1,132 @@
+import ast
+import os
+import cv2
+import numpy as np
+
+# ONNX Runtime is optional - the service falls back to the PyTorch path without it
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNX_AVAILABLE = False
+
+
+def onnx_model_path(weights_path, imgsz: int = 640, suffix: str = "", cache_dir: str | None = None):
+    """Cache location for an ONNX model derived from weights_path (suffix e.g. ".int8")."""
+    cache_dir = cache_dir or os.getenv("MODEL_CACHE_DIR") or os.path.dirname(weights_path)
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return os.path.join(cache_dir, f"{stem}.{imgsz}{suffix}.onnx")
+
+
+def export_onnx(weights_path, imgsz: int = 640, cache_dir: str | None = None):
+    """Export YOLO .pt weights to ONNX once and return the cached .onnx path.
+
+    The export is reused as long as it is newer than the weights file.
+    """
+    onnx_path = onnx_model_path(weights_path, imgsz, cache_dir=cache_dir)
+    cache_dir = os.path.dirname(onnx_path)
+
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(weights_path):
+        return onnx_path
+
+    print(f"📦 Exporting {weights_path} to ONNX (imgsz={imgsz})...")
+    from ultralytics import YOLO
+    exported = YOLO(weights_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        os.replace(exported, onnx_path)
+    print(f"✅ ONNX export cached at {onnx_path}")
+    return onnx_path
+
+
+def letterbox(frame, size: int = 640, color=(114, 114, 114)):
+    """Resize keeping aspect ratio and pad to size x size (same as ultralytics LetterBox)."""
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return frame, scale, (left, top)
+
+
+class OnnxYoloBackend:
+    """YOLO detector running on ONNX Runtime (CPU).
+
+    Mirrors the ultralytics pipeline (letterbox, BGR->RGB, /255, per-class NMS)
+    and returns the same ``[x1, y1, x2, y2, conf, cls]`` rows as the PyTorch path,
+    so detect_fire produces an identical detection schema.
+    """
+
+    def __init__(self, onnx_path, imgsz: int = 640, iou: float = 0.7, max_det: int = 300, threads: int = 0):
+        if not ONNX_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.iou = iou
+        self.max_det = max_det
+        self.path = onnx_path
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        try:
+            self.names = ast.literal_eval(meta.get("names", "{}"))
+        except (ValueError, SyntaxError):
+            self.names = {}
+
+    def preprocess(self, frames):
+        batch, meta = [], []
+        for frame in frames:
+            img, scale, pad = letterbox(frame, self.imgsz)
+            batch.append(img[:, :, ::-1])  # BGR -> RGB
+            meta.append((scale, pad, frame.shape[:2]))
+        blob = np.ascontiguousarray(np.stack(batch).transpose(0, 3, 1, 2), dtype=np.float32)
+        blob /= 255.0
+        return blob, meta
+
+    def postprocess(self, preds, conf_threshold, scale, pad, shape):
+        # preds: (4 + num_classes, N) -> rows of cx, cy, w, h, class scores
+        preds = preds.T
+        scores = preds[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), class_ids]
+        keep = confs >= conf_threshold
+        if not keep.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        preds, confs, class_ids = preds[keep], confs[keep], class_ids[keep]
+        cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+        # Undo letterbox and clip to the original frame
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        xywh = np.stack([boxes[:, 0], boxes[:, 1], boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]], axis=1)
+        idx = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confs.tolist(), class_ids.tolist(), conf_threshold, self.iou)
+        idx = np.array(idx, dtype=np.int64).reshape(-1)[: self.max_det]
+        if len(idx) == 0:
+            return np.zeros((0, 6), dtype=np.float32)
+        idx = idx[np.argsort(-confs[idx])]
+        return np.concatenate([boxes[idx], confs[idx, None], class_ids[idx, None]], axis=1).astype(np.float32)
+
+    def predict(self, frames, conf_threshold):
+        blob, meta = self.preprocess(frames)
+        preds = self.session.run(None, {self.input_name: blob})[0]
+        return [
+            self.postprocess(p, conf_threshold, scale, pad, shape)
+            for p, (scale, pad, shape) in zip(preds, meta)
+        ]
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+
+class _SessionRate:
+    __slots__ = ("min_fps", "max_fps", "desired", "allocated", "last_run", "last_alert", "last_conf", "runs", "started")
+
+    def __init__(self, min_fps, max_fps):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.desired = min_fps
+        self.allocated = min_fps
+        self.last_run = 0.0
+        self.last_alert = 0.0
+        self.last_conf = 0.0
+        self.runs = 0
+        self.started = time.monotonic()
+
+
+class RateController:
+    """Adaptive per-session inference rate under a global host budget.
+
+    A session jumps to its ``max_fps`` as soon as fire/smoke is suspected or the
+    top confidence is rising, and decays back toward ``min_fps`` once it has been
+    quiet for ``quiet_after`` seconds. When the desired rates of all sessions exceed
+    ``budget_fps`` every session keeps its minimum first, suspected sessions get
+    the remaining budget next and quiet sessions share whatever is left.
+    """
+
+    def __init__(self, budget_fps: float = 20.0, min_fps: float = 1.0, max_fps: float = 10.0,
+                 quiet_after: float = 10.0, decay: float = 0.8, rising_delta: float = 0.05):
+        self.budget_fps = budget_fps
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.quiet_after = quiet_after
+        self.decay = decay
+        self.rising_delta = rising_delta
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def register(self, session_id, min_fps=None, max_fps=None):
+        with self._lock:
+            if session_id not in self._sessions:
+                low = float(min_fps or self.min_fps)
+                self._sessions[session_id] = _SessionRate(low, max(low, float(max_fps or self.max_fps)))
+                self._allocate()
+
+    def unregister(self, session_id):
+        with self._lock:
+            if self._sessions.pop(session_id, None) is not None:
+                self._allocate()
+
+    def observe(self, session_id, suspected: bool, confidence: float = 0.0):
+        """Feed the outcome of one inference and re-plan the rates."""
+        now = time.monotonic()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None:
+                return
+            rising = confidence > s.last_conf + self.rising_delta
+            s.last_conf = confidence
+            if suspected or rising:
+                s.desired = s.max_fps
+                s.last_alert = now
+            elif now - s.last_alert > self.quiet_after:
+                s.desired = max(s.min_fps, s.desired * self.decay)
+            self._allocate()
+
+    def _allocate(self):
+        sessions = list(self._sessions.values())
+        if not sessions:
+            return
+        if sum(s.desired for s in sessions) <= self.budget_fps:
+            for s in sessions:
+                s.allocated = s.desired
+            return
+
+        base = sum(s.min_fps for s in sessions)
+        if base >= self.budget_fps:
+            scale = self.budget_fps / base
+            for s in sessions:
+                s.allocated = s.min_fps * scale
+            return
+
+        remaining = self.budget_fps - base
+        alerting = [s for s in sessions if s.desired >= s.max_fps]
+        quiet = [s for s in sessions if s.desired < s.max_fps]
+        for group in (alerting, quiet):
+            extra = sum(s.desired - s.min_fps for s in group)
+            share = min(1.0, remaining / extra) if extra > 0 else 0.0
+            for s in group:
+                s.allocated = s.min_fps + (s.desired - s.min_fps) * share
+            remaining = max(0.0, remaining - extra * share)
+
+    def try_acquire(self, session_id):
+        """Claim an inference slot if this session is due; False means stream without inferring."""
+        now = time.monotonic()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None:
+                return True
+            if now < s.last_run + 1.0 / max(s.allocated, 1e-3):
+                return False
+            s.last_run = now
+            s.runs += 1
+            return True
+
+    def stats(self, session_id):
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None:
+                return None
+            elapsed = max(time.monotonic() - s.started, 1e-3)
+            return {
+                "desired_fps": round(s.desired, 2),
+                "allocated_fps": round(s.allocated, 2),
+                "avg_fps": round(s.runs / elapsed, 2),
+                "min_fps": s.min_fps,
+                "max_fps": s.max_fps,
+            }
+
+    def totals(self):
+        with self._lock:
+            return {
+                "budget_fps": self.budget_fps,
+                "allocated_fps": round(sum(s.allocated for s in self._sessions.values()), 2),
+            }
+
+
+def controller_from_env():
+    """Build a controller using INFERENCE_BUDGET_FPS / INFERENCE_MIN_FPS / INFERENCE_MAX_FPS."""
+    return RateController(
+        budget_fps=float(os.getenv("INFERENCE_BUDGET_FPS", 20)),
+        min_fps=float(os.getenv("INFERENCE_MIN_FPS", 1)),
+        max_fps=float(os.getenv("INFERENCE_MAX_FPS", 10)),
+    )
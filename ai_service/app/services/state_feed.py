@@ -0,0 +1,67 @@
+import itertools
+import threading
+from collections import deque
+
+# One counter for every session so sequence numbers are comparable across sessions
+_global_seq = itertools.count(1)
+_seq_lock = threading.Lock()
+
+
+def next_seq():
+    with _seq_lock:
+        return next(_global_seq)
+
+
+class StateFeed:
+    """Change log of one session's detection state (box set + fire flag).
+
+    ``update`` only records an event when the state signature differs from the
+    previous one. Every event gets a monotonically increasing sequence number;
+    the last ``history`` events are kept so a reconnecting client can replay the
+    transitions it missed after its last seen sequence number.
+    """
+
+    def __init__(self, history: int = 64):
+        self.seq = 0
+        self.latest = None
+        self._signature = None
+        self._events = deque(maxlen=history)
+        self._evicted_seq = 0  # seq of the newest event that fell out of history
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def update(self, signature, state):
+        """Record state if its signature changed. Returns the new seq, or None if unchanged."""
+        with self._cond:
+            if signature == self._signature:
+                return None
+            self._signature = signature
+            self.seq = next_seq()
+            self.latest = dict(state, seq=self.seq)
+            if len(self._events) == self._events.maxlen:
+                self._evicted_seq = self._events[0]["seq"]
+            self._events.append(self.latest)
+            self._cond.notify_all()
+            return self.seq
+
+    def events_since(self, last_seq):
+        """Events after last_seq; just the latest state for new clients or when history has a gap."""
+        with self._cond:
+            if self.latest is None or last_seq >= self.seq:
+                return []
+            if last_seq <= 0:
+                return [self.latest]
+            if last_seq < self._evicted_seq:
+                return [dict(self.latest, resync=True)]
+            return [e for e in self._events if e["seq"] > last_seq]
+
+    def wait(self, last_seq, timeout: float = 15.0):
+        """Block until an event newer than last_seq exists (or timeout); returns events_since."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or self.seq > last_seq, timeout=timeout)
+        return self.events_since(last_seq)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+
+
+def parse_rois(rois):
+    """Validate normalized ROIs [[x1, y1, x2, y2], ...] (0..1). Raises ValueError when invalid."""
+    if not rois:
+        return []
+    parsed = []
+    for roi in rois:
+        if len(roi) != 4:
+            raise ValueError("each ROI must be [x1, y1, x2, y2]")
+        x1, y1, x2, y2 = (float(v) for v in roi)
+        if not (0.0 <= x1 < x2 <= 1.0 and 0.0 <= y1 < y2 <= 1.0):
+            raise ValueError("ROI coordinates must be normalized with x1 < x2 and y1 < y2")
+        parsed.append([x1, y1, x2, y2])
+    return parsed
+
+
+def roi_rects(rois, width, height):
+    """Normalized ROIs -> pixel rects; the whole frame when no ROI is configured."""
+    if not rois:
+        return [(0, 0, width, height)]
+    return [(int(x1 * width), int(y1 * height), int(np.ceil(x2 * width)), int(np.ceil(y2 * height)))
+            for x1, y1, x2, y2 in rois]
+
+
+def _axis_windows(start, end, size, overlap):
+    length = end - start
+    if length <= size:
+        return [(start, end)]
+    step = max(1, int(size * (1.0 - overlap)))
+    positions = list(range(start, end - size, step)) + [end - size]
+    return [(p, p + size) for p in positions]
+
+
+def make_tiles(rect, tile_size: int = 640, overlap: float = 0.2):
+    """Cover rect with tile_size windows at native resolution, overlapping by overlap."""
+    x1, y1, x2, y2 = rect
+    return [(tx1, ty1, tx2, ty2)
+            for ty1, ty2 in _axis_windows(y1, y2, tile_size, overlap)
+            for tx1, tx2 in _axis_windows(x1, x2, tile_size, overlap)]
+
+
+def plan_crops(shape, settings):
+    """Crop windows to infer for one frame, honoring rois / tiling / tile_size / tile_overlap."""
+    height, width = shape[:2]
+    rects = roi_rects(settings.get("rois"), width, height)
+    if not settings.get("tiling", False):
+        return rects
+
+    tile_size = int(settings.get("tile_size", 640))
+    overlap = float(settings.get("tile_overlap", 0.2))
+    crops = []
+    for rect in rects:
+        crops.extend(make_tiles(rect, tile_size, overlap))
+    return crops
+
+
+def merge_crop_boxes(outputs, crops, iou: float = 0.5):
+    """Shift per-crop [x1, y1, x2, y2, conf, cls] rows to frame coordinates and run cross-crop NMS."""
+    shifted = []
+    for boxes, (cx1, cy1, _, _) in zip(outputs, crops):
+        if len(boxes):
+            boxes = boxes.copy()
+            boxes[:, [0, 2]] += cx1
+            boxes[:, [1, 3]] += cy1
+            shifted.append(boxes)
+    if not shifted:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    boxes = np.concatenate(shifted)
+    if len(shifted) == 1:
+        return boxes
+
+    xywh = np.stack([boxes[:, 0], boxes[:, 1], boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]], axis=1)
+    keep = cv2.dnn.NMSBoxesBatched(xywh.tolist(), boxes[:, 4].tolist(), boxes[:, 5].astype(int).tolist(), 0.0, iou)
+    keep = np.array(keep, dtype=np.int64).reshape(-1)
+    return boxes[keep]
+
+
+def infer_crops(frame, conf_threshold, settings, submit_many):
+    """Run the model on the ROI/tile crops of frame as one batch and merge back to frame coordinates."""
+    crops = plan_crops(frame.shape, settings)
+    if len(crops) == 1 and crops[0] == (0, 0, frame.shape[1], frame.shape[0]):
+        return submit_many([frame], conf_threshold)[0]
+
+    images = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in crops]
+    return merge_crop_boxes(submit_many(images, conf_threshold), crops)
@@ -0,0 +1,63 @@
+"""Compact binary messages for the /api/ws transport.
+
+Every message starts with a 6-byte header ``<BBI``: message type, channel and
+a uint32 sequence number. The channel multiplexes several cameras on one socket
+(0-255, chosen by the client). Payloads:
+
+Client -> server
+  FRAME        raw JPEG bytes of a browser camera frame (seq echoed back)
+  SUBSCRIBE    utf-8 server session id whose detections should be pushed
+  UNSUBSCRIBE  empty
+  CONFIG       utf-8 JSON {"camera_name": ..., "sensitivity": ...} for the channel
+
+Server -> client
+  HELLO        utf-8 JSON {"classes": {id: name}} sent once after connecting
+  DETECTIONS   ``<HHBB`` frame_w, frame_h, fire flag, box count, then per box
+               ``<HHHHHBH`` x1, y1, x2, y2, confidence * 10000, class id, track id
+  ERROR        utf-8 message
+"""
+import struct
+
+FRAME = 0x01
+SUBSCRIBE = 0x02
+UNSUBSCRIBE = 0x03
+CONFIG = 0x04
+
+HELLO = 0x10
+DETECTIONS = 0x11
+ERROR = 0x1F
+
+HEADER = struct.Struct('<BBI')
+DETECTIONS_HEAD = struct.Struct('<HHBB')
+BOX = struct.Struct('<HHHHHBH')
+
+
+def pack(msg_type, channel, seq, payload=b''):
+    return HEADER.pack(msg_type, channel & 0xFF, seq & 0xFFFFFFFF) + payload
+
+
+def unpack(message):
+    """Split a binary message into (type, channel, seq, payload memoryview)."""
+    if len(message) < HEADER.size:
+        raise ValueError("message shorter than header")
+    msg_type, channel, seq = HEADER.unpack_from(message)
+    return msg_type, channel, seq, memoryview(message)[HEADER.size:]
+
+
+def _u16(value):
+    return max(0, min(0xFFFF, int(value)))
+
+
+def pack_detections(channel, seq, frame_w, frame_h, fire, detections, class_ids):
+    """DETECTIONS message for the detection dicts returned by detect_fire / tracker snapshots."""
+    boxes = detections[:255]
+    parts = [DETECTIONS_HEAD.pack(_u16(frame_w), _u16(frame_h), 1 if fire else 0, len(boxes))]
+    for det in boxes:
+        x1, y1, x2, y2 = det["bbox"]
+        parts.append(BOX.pack(
+            _u16(x1), _u16(y1), _u16(x2), _u16(y2),
+            _u16(round(det["confidence"] * 10000)),
+            class_ids.get(det["class"], 255) & 0xFF,
+            _u16(det.get("track_id") or 0),
+        ))
+    return pack(DETECTIONS, channel, seq, b''.join(parts))
@@ -26,3 +26,11 @@ def token_required(f):
             print("❌ Decorated function returned None!")
         return result
     return decorated
+
+def decode_token(token):
+    """Decode JWT token and return username, or None if invalid"""
+    try:
+        data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        return data.get('username')
+    except Exception:
+        return None
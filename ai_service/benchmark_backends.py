@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+
+# Run from ai_service/: python benchmark_backends.py --source clip.mp4
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.services.onnx_backend import OnnxYoloBackend, export_onnx, ONNX_AVAILABLE
+
+
+def load_frames(source, count):
+    frames = []
+    if source and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            img = cv2.imread(os.path.join(source, name))
+            if img is not None:
+                frames.append(img)
+            if len(frames) >= count:
+                break
+    elif source:
+        cap = cv2.VideoCapture(source)
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+
+    if not frames:
+        print("⚠️ No source frames, using random 1280x720 noise")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+    return frames
+
+
+def time_backend(name, predict, frames, conf, warmup):
+    for frame in frames[:warmup]:
+        predict([frame], conf)
+
+    latencies = []
+    total_boxes = 0
+    for frame in frames:
+        started = time.perf_counter()
+        boxes = predict([frame], conf)[0]
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        total_boxes += len(boxes)
+
+    lat = np.array(latencies)
+    print(f"  {name:<8} mean {lat.mean():7.1f} ms | p50 {np.percentile(lat, 50):7.1f} ms | "
+          f"p95 {np.percentile(lat, 95):7.1f} ms | {1000.0 / lat.mean():5.1f} FPS | boxes {total_boxes}")
+    return lat.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame latency: PyTorch vs ONNX Runtime")
+    parser.add_argument("--weights", default="best (13).pt")
+    parser.add_argument("--source", default="", help="video file or folder of images")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--conf", type=float, default=0.25)
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    weights = os.path.join(base_dir, args.weights)
+    frames = load_frames(args.source, args.frames)
+    print(f"--- BENCHMARK: {args.weights}, {len(frames)} frames, imgsz=640 ---")
+
+    from ultralytics import YOLO
+    torch_model = YOLO(weights)
+
+    def torch_predict(batch, conf):
+        results = torch_model(batch, imgsz=640, conf=conf, verbose=False)
+        return [r.boxes.data.cpu().numpy() for r in results]
+
+    torch_ms = time_backend("torch", torch_predict, frames, args.conf, args.warmup)
+
+    if not ONNX_AVAILABLE:
+        print("  [SKIP] onnxruntime not installed")
+        return
+
+    onnx_model = OnnxYoloBackend(export_onnx(weights, imgsz=640))
+    onnx_ms = time_backend("onnx", onnx_model.predict, frames, args.conf, args.warmup)
+    print(f"  Speedup: {torch_ms / onnx_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
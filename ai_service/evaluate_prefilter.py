@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Run from ai_service/: python evaluate_prefilter.py --clips test_clips/
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.services.fire_prefilter import FirePrefilter
+from quantize_model import iter_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU saving vs recall of the colour/flicker prefilter")
+    parser.add_argument("--weights", default="best (13).pt")
+    parser.add_argument("--clips", required=True, help="folder of test clips/frames")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--color-min", type=float, default=0.0005)
+    parser.add_argument("--flicker-min", type=float, default=0.05)
+    parser.add_argument("--frames", type=int, default=0, help="max frames (0 = all)")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    model = YOLO(os.path.join(base_dir, args.weights))
+
+    prefilter = None
+    current_clip = None
+    yolo_ms, filter_ms = [], []
+    passed = fire_frames = fire_passed = 0
+
+    for name, frame in iter_frames(args.clips, limit=args.frames or None):
+        # One prefilter per clip so flicker state never spans two clips
+        clip = name.split('#')[0]
+        if clip != current_clip:
+            prefilter = FirePrefilter(color_min=args.color_min, flicker_min=args.flicker_min)
+            current_clip = clip
+
+        started = time.perf_counter()
+        candidate = prefilter.is_candidate(frame)
+        filter_ms.append((time.perf_counter() - started) * 1000.0)
+
+        started = time.perf_counter()
+        result = model(frame, imgsz=640, conf=args.conf, verbose=False)[0]
+        yolo_ms.append((time.perf_counter() - started) * 1000.0)
+
+        has_fire = any(model.names[int(c)].lower() in ('fire', 'smoke') for c in result.boxes.cls.tolist())
+        passed += int(candidate)
+        fire_frames += int(has_fire)
+        fire_passed += int(has_fire and candidate)
+
+    frames = len(yolo_ms)
+    if not frames:
+        print("❌ No frames found")
+        return
+
+    baseline = np.mean(yolo_ms)
+    cascade = np.mean(filter_ms) + baseline * passed / frames
+    print("--- PREFILTER REPORT ---")
+    print(f"  Frames:             {frames}")
+    print(f"  Sent to YOLO:       {passed} ({passed / frames:.1%})")
+    print(f"  Prefilter cost:     {np.mean(filter_ms):.2f} ms/frame")
+    print(f"  YOLO cost:          {baseline:.1f} ms/frame")
+    print(f"  Cascade cost:       {cascade:.1f} ms/frame ({1 - cascade / baseline:.1%} CPU saved)")
+    if fire_frames:
+        print(f"  Fire-frame recall:  {fire_passed}/{fire_frames} ({fire_passed / fire_frames:.1%})")
+    else:
+        print("  Fire-frame recall:  n/a (YOLO found no fire in these clips)")
+
+
+if __name__ == "__main__":
+    main()
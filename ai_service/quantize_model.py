@@ -0,0 +1,224 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+
+# Run from ai_service/:
+#   python quantize_model.py --weights "best (13).pt" --calib calib_frames/ --eval eval_clips/
+# Then serve the result with INFERENCE_BACKEND=int8
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.services.onnx_backend import OnnxYoloBackend, export_onnx, onnx_model_path, letterbox, ONNX_AVAILABLE
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTS = ('.mp4', '.avi', '.mkv', '.mov')
+
+
+def iter_frames(folder, limit=None, stride=1):
+    """Yield BGR frames from every image and video file in folder."""
+    count = 0
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in IMAGE_EXTS:
+            img = cv2.imread(path)
+            if img is not None:
+                yield name, img
+                count += 1
+        elif ext in VIDEO_EXTS:
+            cap = cv2.VideoCapture(path)
+            idx = 0
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if idx % stride == 0:
+                    yield f"{name}#{idx}", frame
+                    count += 1
+                    if limit and count >= limit:
+                        break
+                idx += 1
+            cap.release()
+        if limit and count >= limit:
+            return
+
+
+class FrameCalibrationReader:
+    """onnxruntime CalibrationDataReader over calibration frames (same preprocessing as serving)."""
+
+    def __init__(self, folder, input_name, imgsz=640, limit=200):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._frames = iter_frames(folder, limit=limit, stride=15)
+
+    def get_next(self):
+        for _, frame in self._frames:
+            img, _, _ = letterbox(frame, self.imgsz)
+            blob = np.ascontiguousarray(img[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+            return {self.input_name: blob}
+        return None
+
+
+def detect_head_nodes(onnx_model):
+    """Nodes of the final Detect module (box decoding is sensitive to INT8 error)."""
+    pattern = re.compile(r"/model\.(\d+)/")
+    indices = [int(m.group(1)) for n in onnx_model.graph.node for m in [pattern.search(n.name)] if m]
+    if not indices:
+        return []
+    head = f"/model.{max(indices)}/"
+    return [n.name for n in onnx_model.graph.node if head in n.name]
+
+
+def quantize(fp32_path, int8_path, calib_dir, limit, exclude_head=True):
+    import onnx
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType, CalibrationMethod
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prep_path = fp32_path.replace('.onnx', '.prep.onnx')
+    quant_pre_process(fp32_path, prep_path)
+
+    fp32_model = onnx.load(prep_path)
+    input_name = fp32_model.graph.input[0].name
+    exclude = detect_head_nodes(fp32_model) if exclude_head else []
+    print(f"⚙️ Calibrating on {calib_dir} (max {limit} frames), excluding {len(exclude)} head nodes")
+
+    quantize_static(
+        prep_path, int8_path,
+        FrameCalibrationReader(calib_dir, input_name, limit=limit),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=exclude,
+    )
+
+    # Keep ultralytics metadata (class names, stride) so the backend can label boxes
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(onnx.load(fp32_path).metadata_props)
+    onnx.save(int8_model, int8_path)
+    os.remove(prep_path)
+    print(f"✅ INT8 model written to {int8_path}")
+
+
+def box_iou(a, b):
+    x1, y1 = np.maximum(a[0], b[:, 0]), np.maximum(a[1], b[:, 1])
+    x2, y2 = np.minimum(a[2], b[:, 2]), np.minimum(a[3], b[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+FIRE_CLASSES = ('fire', 'smoke')
+
+
+def fire_class_ids(backend):
+    """Class ids the detector treats as fire (same names as detect_fire)."""
+    names = getattr(backend, "names", None) or {}
+    return [int(idx) for idx, name in names.items() if str(name).lower() in FIRE_CLASSES]
+
+
+def evaluate(fp32, int8, eval_dir, conf, limit):
+    """Compare INT8 against the FP32 model as reference on a held-out clip set."""
+    fire_ids = fire_class_ids(fp32)
+    fp32_ms, int8_ms = [], []
+    ref_boxes = matched = extra = 0
+    ref_fire_frames = fire_frames_kept = 0
+
+    for _, frame in iter_frames(eval_dir, limit=limit):
+        started = time.perf_counter()
+        ref = fp32.predict([frame], conf)[0]
+        fp32_ms.append((time.perf_counter() - started) * 1000.0)
+
+        started = time.perf_counter()
+        out = int8.predict([frame], conf)[0]
+        int8_ms.append((time.perf_counter() - started) * 1000.0)
+
+        used = np.zeros(len(out), dtype=bool)
+        for box in ref:
+            ref_boxes += 1
+            same_cls = (out[:, 5] == box[5]) & ~used if len(out) else np.zeros(0, dtype=bool)
+            if same_cls.any():
+                ious = np.where(same_cls, box_iou(box, out), 0.0)
+                best = int(ious.argmax())
+                if ious[best] >= 0.5:
+                    used[best] = True
+                    matched += 1
+        extra += int((~used).sum())
+
+        # Fire-frame recall only counts frames where FP32 saw fire/smoke, and INT8 must too
+        if np.isin(ref[:, 5], fire_ids).any():
+            ref_fire_frames += 1
+            fire_frames_kept += int(np.isin(out[:, 5], fire_ids).any())
+
+    frames = len(fp32_ms)
+    return {
+        "frames": frames,
+        "fp32_ms": round(float(np.mean(fp32_ms)), 2) if frames else None,
+        "int8_ms": round(float(np.mean(int8_ms)), 2) if frames else None,
+        "speedup": round(float(np.mean(fp32_ms) / np.mean(int8_ms)), 2) if frames else None,
+        "box_recall_vs_fp32": round(matched / ref_boxes, 4) if ref_boxes else None,
+        "box_precision_vs_fp32": round(matched / (matched + extra), 4) if (matched + extra) else None,
+        "fire_frame_recall_vs_fp32": round(fire_frames_kept / ref_fire_frames, 4) if ref_fire_frames else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization for the fire detector")
+    parser.add_argument("--weights", default="best (13).pt")
+    parser.add_argument("--calib", required=True, help="folder of calibration frames/clips")
+    parser.add_argument("--eval", default="", help="held-out folder of clips/frames for the report")
+    parser.add_argument("--calib-frames", type=int, default=200)
+    parser.add_argument("--eval-frames", type=int, default=500)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--quantize-head", action="store_true", help="also quantize the Detect head (less accurate)")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="accept threshold for fire-frame recall")
+    args = parser.parse_args()
+
+    if not ONNX_AVAILABLE:
+        print("❌ onnxruntime is not installed")
+        sys.exit(1)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    weights = os.path.join(base_dir, args.weights)
+    fp32_path = export_onnx(weights, imgsz=640)
+    int8_path = onnx_model_path(weights, 640, suffix=".int8")
+
+    quantize(fp32_path, int8_path, args.calib, args.calib_frames, exclude_head=not args.quantize_head)
+
+    if not args.eval:
+        print("⚠️ No --eval folder given, skipping accuracy/latency report")
+        return
+
+    report = evaluate(OnnxYoloBackend(fp32_path), OnnxYoloBackend(int8_path), args.eval, args.conf, args.eval_frames)
+    recall = report["fire_frame_recall_vs_fp32"]
+    # No fire frames in the eval set means nothing was measured: never accept on that
+    report["accepted"] = recall is not None and recall >= args.min_recall
+    report["weights"] = args.weights
+    report["int8_model"] = int8_path
+
+    report_path = int8_path.replace('.onnx', '.report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("--- INT8 REPORT ---")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+    print(f"📄 Report saved to {report_path}")
+    if report["accepted"]:
+        print("✅ ACCEPT: serve with INFERENCE_BACKEND=int8")
+    elif recall is None:
+        print("❌ INCONCLUSIVE: the eval set has no fire/smoke frames, keep the FP32 model")
+        sys.exit(2)
+    else:
+        print("❌ REJECT: keep the FP32 model")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("cv2")
+jwt = pytest.importorskip("jwt")
+
+from app import create_app
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def auth(app, username="alice"):
+    token = jwt.encode({"username": username}, app.config["SECRET_KEY"], algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_meta_entries_must_be_objects(app):
+    response = app.test_client().post(
+        "/api/process-batch",
+        data={"frames": (BytesIO(b"jpeg"), "frame.jpg"), "meta": '["cam-1"]'},
+        content_type="multipart/form-data",
+        headers=auth(app),
+    )
+
+    assert response.status_code == 400
+    assert "meta" in response.get_json()["error"]
+
+
+def test_json_frames_must_be_objects(app):
+    response = app.test_client().post(
+        "/api/process-batch", json={"frames": ["aGVsbG8="]}, headers=auth(app)
+    )
+
+    assert response.status_code == 400
+
+
+def test_non_numeric_sensitivity_is_rejected(app):
+    response = app.test_client().post(
+        "/api/process-batch",
+        json={"frames": [{"frame": "aGVsbG8="}], "sensitivity": "high"},
+        headers=auth(app),
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("cv2")
+jwt = pytest.importorskip("jwt")
+
+from app import create_app
+from app.services import detector
+
+SESSION_ID = "test-session"
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def session():
+    session = {
+        "owner": "alice",
+        "settings": {"sensitivity": 70, "frame_skip": 2, "confirm_frames": 1},
+        "grabber": SimpleNamespace(frame_skip=2),
+        "motion_gate": None,
+        "prefilter": None,
+    }
+    detector.sessions[SESSION_ID] = session
+    yield session
+    detector.sessions.pop(SESSION_ID, None)
+
+
+def update(app, payload, username="alice"):
+    token = jwt.encode({"username": username}, app.config["SECRET_KEY"], algorithm="HS256")
+    return app.test_client().post(
+        "/api/update-settings", json=payload, headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+def test_frame_skip_applies_to_running_session(app, session):
+    response = update(app, {"session_id": SESSION_ID, "frame_skip": "4"})
+
+    assert response.status_code == 200
+    assert session["settings"]["frame_skip"] == 4
+    assert session["grabber"].frame_skip == 4
+
+
+def test_non_numeric_setting_is_rejected(app, session):
+    response = update(app, {"session_id": SESSION_ID, "frame_skip": "fast"})
+
+    assert response.status_code == 400
+    assert session["settings"]["frame_skip"] == 2
+
+
+def test_other_users_session_is_not_found(app, session):
+    response = update(app, {"session_id": SESSION_ID, "frame_skip": 4}, username="bob")
+
+    assert response.status_code == 404
+    assert session["settings"]["frame_skip"] == 2
+
+
+def test_tiling_and_stream_settings_apply_to_running_session(app, session):
+    response = update(app, {
+        "session_id": SESSION_ID,
+        "tiling": True,
+        "tile_size": "512",
+        "tile_overlap": 0.25,
+        "stream_width": 480,
+        "rois": [[0, 0, 0.5, 0.5]],
+    })
+
+    assert response.status_code == 200
+    settings = session["settings"]
+    assert settings["tiling"] is True
+    assert settings["tile_size"] == 512
+    assert settings["tile_overlap"] == 0.25
+    assert settings["stream_width"] == 480
+    assert settings["rois"] == [[0.0, 0.0, 0.5, 0.5]]
+
+
+def test_update_all_applies_the_same_keys(app, session):
+    response = update(app, {"tiling": True, "tile_size": 320, "rois": [[0.5, 0.5, 1, 1]]})
+
+    assert response.status_code == 200
+    assert session["settings"]["tile_size"] == 320
+    assert session["settings"]["rois"] == [[0.5, 0.5, 1.0, 1.0]]
+
+
+def test_invalid_rois_leave_session_untouched(app, session):
+    response = update(app, {"session_id": SESSION_ID, "tile_size": 320, "rois": [[0.5, 0, 0.2, 1]]})
+
+    assert response.status_code == 400
+    assert "tile_size" not in session["settings"]
+
+
+def test_confirm_frames_is_clamped(app, session):
+    response = update(app, {"session_id": SESSION_ID, "confirm_frames": 0})
+
+    assert response.status_code == 200
+    assert session["settings"]["confirm_frames"] == 1
+
+
+def test_motion_gate_settings_rebuild_the_gate(app, session):
+    response = update(app, {
+        "session_id": SESSION_ID, "motion_gate": True, "motion_threshold": "0.01", "motion_refresh_s": 2,
+    })
+
+    assert response.status_code == 200
+    gate = session["motion_gate"]
+    assert gate is not None
+    assert gate.threshold == 0.01
+    assert gate.refresh_interval == 2.0
+
+
+def test_prefilter_settings_rebuild_the_prefilter(app, session):
+    response = update(app, {
+        "session_id": SESSION_ID, "prefilter": True, "prefilter_sat_min": "300", "prefilter_color_min": 0.002,
+    })
+
+    assert response.status_code == 200
+    prefilter = session["prefilter"]
+    assert prefilter is not None
+    assert prefilter.sat_min == 255
+    assert prefilter.color_min == 0.002
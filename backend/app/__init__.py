@@ -19,13 +19,21 @@ def create_app():
         r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "OPTIONS", "PUT", "DELETE"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match"],
+            "expose_headers": ["ETag", "X-Has-More", "X-Next-Before-Id", "X-Newest-Id", "X-Max-Id", "X-Version"]
         }
     })
     
     # Initialize DB (creates tables if needed)
     with app.app_context():
         init_db()
+
+    # Start the alarm writer now so alarms journaled during a DB outage are replayed at boot
+    from .services.detector import alarm_writer
+    from .services.alarm_writer import flush_on_exit
+    alarm_writer.start()
+    # Queued alarms reach MySQL (or the journal) on shutdown instead of being dropped
+    flush_on_exit(alarm_writer)
     
     # Register Blueprints
     app.register_blueprint(auth_bp)
@@ -38,10 +46,15 @@ def create_app():
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
-        from .services.detector import sessions
+        from .services.detector import sessions, alarm_writer
+        from .database import pool
+        from .services.settings_cache import notification_cache
         return jsonify({
             'status': 'running',
-            'active_sessions': len(sessions)
+            'active_sessions': len(sessions),
+            'db_pool': pool.stats(),
+            'alarm_writer': alarm_writer.stats(),
+            'notification_cache': notification_cache.stats()
         })
         
     return app
@@ -1,18 +1,32 @@
 import mysql.connector
 import os
+from .db_pool import ConnectionPool, PoolTimeout
+from .migrations import run_migrations
+
+def _connect():
+    print(f"🔌 Opening DB connection: Host={os.getenv('DB_HOST')}, User={os.getenv('DB_USER')}, DB={os.getenv('DB_NAME')}")
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        database=os.getenv('DB_NAME', 'railway'),
+        connection_timeout=10
+    )
+
+# Shared by every route and the detector; close() returns a connection to the pool
+pool = ConnectionPool(
+    _connect,
+    size=int(os.getenv('DB_POOL_SIZE', 5)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    ping_after=float(os.getenv('DB_POOL_PING_AFTER', 30))
+)
 
 def get_db_connection():
     try:
-        print(f"🔌 CONNECTING TO DB: Host={os.getenv('DB_HOST')}, User={os.getenv('DB_USER')}, DB={os.getenv('DB_NAME')}")
-        conn = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', ''),
-            database=os.getenv('DB_NAME', 'railway'),
-            connection_timeout=10
-        )
-        print("✅ DB Connection successful")
-        return conn
+        return pool.acquire()
+    except PoolTimeout as e:
+        print(f"❌ DB pool exhausted: {e}")
+        return None
     except mysql.connector.Error as e:
         print(f"❌ DB Connection failed: {e}")
         return None
@@ -20,6 +34,12 @@ def get_db_connection():
         print(f"❌ Unexpected DB error: {e}")
         return None
 
+def bump_alarm_version(c):
+    """Next alarm change version (atomic across processes); stamp it on rows whose status changes."""
+    c.execute("UPDATE alarm_changes SET version = LAST_INSERT_ID(version + 1) WHERE id = 1")
+    c.execute("SELECT LAST_INSERT_ID()")
+    return c.fetchone()[0]
+
 def init_db():
     try:
         # Connect to MySQL Server first to create DB if not exists
@@ -62,7 +82,7 @@ def init_db():
         except Exception as e:
             # Catch ALL migration errors to prevent app crash (502)
             print(f"Migration warning detected (Non-fatal): {e}")
-        
+
         # Table Users
         c.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -137,6 +157,12 @@ def init_db():
         ''')
         
         conn.commit()
+
+        # Versioned schema changes (indexes, typed alarm columns); see migrations.MIGRATIONS
+        try:
+            run_migrations(conn)
+        except Exception as e:
+            print(f"Schema migration warning (Non-fatal, retried next startup): {e}")
         conn.close()
         print(f"✅ Database initialized ({db_name}: alarms, users, notification_settings, password_resets)")
     except Exception as e:
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the checkout timeout."""
+
+
+class PooledConnection:
+    """A borrowed connection. ``close()`` hands it back to the pool instead of closing the socket."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def is_connected(self):
+        return self._conn is not None and self._conn.is_connected()
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # Call sites that forget close() (or raise before it) still give the slot back
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections shared by all request threads.
+
+    ``connect`` opens a new physical connection. At most ``size`` connections
+    exist; a checkout waits up to ``timeout`` seconds for one to be returned and
+    raises PoolTimeout otherwise. Connections idle for more than ``ping_after``
+    seconds are pinged before reuse and replaced when the ping fails. Returned
+    connections are rolled back so the next borrower never inherits an open
+    transaction (or its stale REPEATABLE READ snapshot).
+    """
+
+    def __init__(self, connect, size: int = 5, timeout: float = 5.0, ping_after: float = 30.0):
+        self.connect = connect
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = deque()   # (connection, last_used)
+        self._open = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"no DB connection free after {self.timeout:.1f}s (pool size {self.size})")
+                waited = True
+                self._cond.wait(remaining)
+            self.checkouts += 1
+            if waited:
+                wait = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += wait
+                self.max_wait = max(self.max_wait, wait)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self.ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._close_quietly(conn)
+                    with self._cond:
+                        self.discarded += 1
+                    conn = None
+            if conn is None:
+                conn = self.connect()
+                with self._cond:
+                    self.created += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        healthy = True
+        try:
+            if not conn.is_connected():
+                healthy = False
+            elif conn.in_transaction:
+                conn.consume_results()
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        if not healthy:
+            self._close_quietly(conn)
+        with self._cond:
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._open -= 1
+                self.discarded += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "avg_wait_ms": round(1000 * self.wait_time / self.waits, 1) if self.waits else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait, 1),
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "discarded": self.discarded,
+            }
@@ -0,0 +1,185 @@
+import os
+import time
+
+# Rows per backfill UPDATE; each chunk is its own short transaction (MIGRATION_CHUNK_SIZE)
+BACKFILL_CHUNK = int(os.getenv('MIGRATION_CHUNK_SIZE', 2000))
+# Serialises migrations between services/replicas starting against the same database
+MIGRATION_LOCK = "firevision_schema_migrations"
+
+def column_exists(c, table, column):
+    c.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+    return bool(c.fetchall())
+
+def ensure_column(c, table, column, definition):
+    """ADD COLUMN unless it exists; INSTANT (metadata only) where the server supports it."""
+    if column_exists(c, table, column):
+        return False
+    print(f"Migrating: Adding '{column}' column to {table} table")
+    try:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}, ALGORITHM=INSTANT")
+    except Exception:
+        # MySQL < 8.0.12 / MariaDB < 10.3: online in-place rebuild instead
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+def ensure_index(c, table, name, columns):
+    """CREATE INDEX unless an index with that name already exists (MySQL has no IF NOT EXISTS)."""
+    c.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if c.fetchall():
+        return False
+    print(f"Migrating: Adding index {name} ({columns}) to {table}")
+    # Online build: concurrent alarm inserts keep going while the index is created
+    c.execute(f"CREATE INDEX {name} ON {table} ({columns}) ALGORITHM=INPLACE LOCK=NONE")
+    return True
+
+def drop_index(c, table, name):
+    c.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if not c.fetchall():
+        return False
+    print(f"Migrating: Dropping index {name} from {table}")
+    c.execute(f"DROP INDEX {name} ON {table}")
+    return True
+
+def ensure_foreign_key(c, table, name, definition):
+    c.execute("""
+        SELECT 1 FROM information_schema.TABLE_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND CONSTRAINT_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+    """, (table, name))
+    if c.fetchall():
+        return False
+    print(f"Migrating: Adding foreign key {name} to {table}")
+    # With checks off InnoDB adds the constraint in place instead of copying the table
+    c.execute("SET SESSION foreign_key_checks = 0")
+    try:
+        c.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    finally:
+        c.execute("SET SESSION foreign_key_checks = 1")
+    return True
+
+def backfill_by_id(conn, c, sql, chunk=None):
+    """Run ``sql`` (with ``id > %s AND id <= %s`` placeholders) over the table in primary-key ranges.
+
+    Committing after every range keeps each transaction - and the row locks it
+    holds - small, so live inserts and status updates never wait on the backfill.
+    """
+    chunk = chunk or BACKFILL_CHUNK
+    c.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM alarms")
+    low, high = c.fetchone()
+    updated = 0
+    started = time.monotonic()
+    for start in range(low - 1, high, chunk):
+        c.execute(sql, (start, start + chunk))
+        updated += c.rowcount
+        conn.commit()
+    print(f"Migrating: Backfilled {updated} alarm row(s) in {time.monotonic() - started:.1f}s")
+    return updated
+
+def _history_indexes(conn, c):
+    # Every /api/history filter pairs with id so keyset pages
+    # (WHERE <filter> AND id < cursor ORDER BY id DESC LIMIT n) are a single index range read
+    ensure_index(c, "alarms", "idx_alarms_camera_id", "camera_id, id")
+    ensure_index(c, "alarms", "idx_alarms_status_id", "status, id")
+    ensure_index(c, "alarms", "idx_alarms_camera_status_id", "camera_id, status, id")
+
+def _change_tracking(conn, c):
+    # /api/history ETags and since_id deltas: alarms.version holds the alarm_changes
+    # counter value of the row's last status change (0 = never changed)
+    ensure_column(c, "alarms", "version", "BIGINT NOT NULL DEFAULT 0")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS alarm_changes (
+            id TINYINT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    c.execute("INSERT IGNORE INTO alarm_changes (id, version) VALUES (1, 0)")
+    conn.commit()
+    ensure_index(c, "alarms", "idx_alarms_version", "version")
+
+def _typed_alarms(conn, c):
+    # occurred_at: the alarm time as a real DATETIME (timestamp stays for old readers).
+    # The default covers writers that don't set it yet; existing rows are backfilled below.
+    ensure_column(c, "alarms", "occurred_at", "DATETIME NULL DEFAULT CURRENT_TIMESTAMP")
+    ensure_column(c, "alarms", "owner", "VARCHAR(255) NULL")
+    ensure_foreign_key(
+        c, "alarms", "fk_alarms_owner",
+        "FOREIGN KEY (owner) REFERENCES users(username) ON DELETE SET NULL ON UPDATE CASCADE"
+    )
+    # Only well-formed text is converted (STR_TO_DATE on garbage is an error in strict mode);
+    # other rows get NULL rather than keeping the migration time from the column default.
+    # %% escapes the format for the connector's parameter substitution.
+    backfill_by_id(conn, c, """
+        UPDATE alarms
+        SET occurred_at = IF(timestamp REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$',
+                             STR_TO_DATE(timestamp, '%%Y-%%m-%%d %%H:%%i:%%s'), NULL)
+        WHERE id > %s AND id <= %s
+    """)
+
+def _typed_history_indexes(conn, c):
+    ensure_index(c, "alarms", "idx_alarms_occurred_at", "occurred_at")
+    ensure_index(c, "alarms", "idx_alarms_owner_id", "owner, id")
+    ensure_index(c, "alarms", "idx_alarms_owner_camera_id", "owner, camera_id, id")
+    ensure_index(c, "alarms", "idx_alarms_owner_occurred_at", "owner, occurred_at")
+    ensure_index(c, "alarms", "idx_alarms_camera_occurred_at", "camera_id, occurred_at")
+    # Time filters moved to occurred_at; the VARCHAR index only cost writes
+    drop_index(c, "alarms", "idx_alarms_timestamp")
+
+def _clear_unparsed_times(conn, c):
+    # Databases migrated before step 3 nulled them: rows whose text timestamp could not be
+    # parsed were left with the migration time as their occurred_at
+    backfill_by_id(conn, c, """
+        UPDATE alarms
+        SET occurred_at = NULL
+        WHERE id > %s AND id <= %s
+          AND occurred_at IS NOT NULL
+          AND NOT (COALESCE(timestamp, '') REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$')
+    """)
+
+# (version, name, step) - append only, never renumber. Each step must be safe to
+# re-run: DDL commits implicitly, so a crash can leave a step half applied.
+MIGRATIONS = [
+    (1, "alarm history indexes", _history_indexes),
+    (2, "alarm change tracking", _change_tracking),
+    (3, "typed alarm time and owner", _typed_alarms),
+    (4, "owner and time history indexes", _typed_history_indexes),
+    (5, "clear unparsed alarm times", _clear_unparsed_times),
+]
+
+def applied_versions(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255),
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in c.fetchall()}
+
+def run_migrations(conn):
+    """Apply pending MIGRATIONS in order; just a schema_migrations lookup when the schema is current."""
+    c = conn.cursor()
+    if not [m for m in MIGRATIONS if m[0] not in applied_versions(c)]:
+        return 0
+
+    c.execute("SELECT GET_LOCK(%s, 60)", (MIGRATION_LOCK,))
+    if not c.fetchone()[0]:
+        print("⚠️ Schema migrations locked by another process; skipping this startup")
+        return 0
+    try:
+        # Another process may have finished them while we waited for the lock
+        applied = applied_versions(c)
+        count = 0
+        for version, name, step in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"🛠️ Applying schema migration {version}: {name}")
+            step(conn, c)
+            c.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            count += 1
+        print(f"✅ Applied {count} schema migration(s)")
+        return count
+    finally:
+        c.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+        c.fetchall()
@@ -6,6 +6,7 @@ import os
 from ..utils.decorators import token_required
 from ..services.detector import load_model, generate_frames, sessions, model
 from ..database import get_db_connection
+from ..services.settings_cache import notification_cache
 
 stream_bp = Blueprint('stream', __name__, url_prefix='/api')
 
@@ -73,11 +74,7 @@ def start_detection_impl(current_user):
         # Fetch Notification Settings
         notif_settings = {}
         try:
-            conn = get_db_connection()
-            c = conn.cursor(dictionary=True)
-            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-            row = c.fetchone()
-            conn.close()
+            row = notification_cache.get(username)
             if row:
                 notif_settings = row
                 print(f"✅ Notification settings loaded for {username}")
@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
-from ..utils.decorators import token_required
-from ..database import get_db_connection
+from flask import Blueprint, request, jsonify, Response
+import zlib
+from ..utils.decorators import token_required, decode_token
+from ..database import get_db_connection, bump_alarm_version
 from ..services import detector
+from ..services.settings_cache import notification_cache
 
 user_bp = Blueprint('user', __name__, url_prefix='/api')
 
@@ -66,13 +68,11 @@ def notification_settings_api(current_user):
     if not username:
         return jsonify({'error': 'Username required'}), 400
 
-    conn = get_db_connection()
-    c = conn.cursor(dictionary=True)
-
     if request.method == 'GET':
+        # Served from the cache; a miss loads through its own pooled connection,
+        # so none is held here while waiting for it
         try:
-            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-            settings = c.fetchone()
+            settings = notification_cache.get(username)
             if not settings:
                 # Return defaults
                 settings = {
@@ -85,10 +85,10 @@ def notification_settings_api(current_user):
             return jsonify(settings)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-        finally:
-            conn.close()
 
     elif request.method == 'POST':
+        conn = get_db_connection()
+        c = conn.cursor(dictionary=True)
         try:
             # UPSERT
             sql = """
@@ -120,16 +120,15 @@ def notification_settings_api(current_user):
                 data.get('email_recipient', '')
             )
             c.execute(sql, vals)
+            # Write-through with exactly the row this transaction wrote (a reload could race older loads)
+            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
+            settings = c.fetchone()
             conn.commit()
             
-            # Update active sessions for this user
+            notification_cache.put(username, settings)
             for sid, s in detector.sessions.items():
                 if s.get('owner') == username:
-                    # We need a new cursor for this check or reuse? Better create new.
-                    # Wait, we are already inside a function with connection 'conn'
-                    # Reuse 'conn' for this fetch
-                    c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-                    s['notification_settings'] = c.fetchone()
+                    s['notification_settings'] = settings
                     print(f"🔄 Updated live settings for session {sid}")
 
             return jsonify({'status': 'saved'})
@@ -166,7 +165,7 @@ def update_settings(current_user):
 
 @user_bp.route('/add-alarm', methods=['POST'])
 def add_alarm():
-    """Add new alarm record from frontend detection"""
+    """Queue an alarm record from frontend detection (written by the background alarm writer)"""
     print("🚨 POST /api/add-alarm called")
     
     try:
@@ -176,26 +175,24 @@ def add_alarm():
         camera_id = data.get('camera_id', 'Unknown Camera')
         confidence = float(data.get('confidence', 0))
         zone = data.get('zone', 'Default Zone')
-        timestamp = data.get('timestamp', '')
         
         # Generate UUID for this alarm
         import uuid
         from datetime import datetime
         
         alarm_uuid = str(uuid.uuid4())
-        if not timestamp:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # occurred_at is parsed from this text, so it must be the client's detection time
+        try:
+            occurred = _history_time(data['timestamp'], 'timestamp') if data.get('timestamp') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        timestamp = occurred or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        conn = get_db_connection()
-        if not conn:
-            print("❌ DB connection failed")
-            return jsonify({'error': 'Database connection failed'}), 500
+        # Anonymous demo pages may still post alarms; they just have no owner
+        auth_header = request.headers.get('Authorization', '')
+        owner = decode_token(auth_header.split(' ')[-1]) if auth_header else None
         
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO alarms (uuid, timestamp, camera_id, zone, confidence, status, image_path)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
+        detector.alarm_writer.enqueue((
             alarm_uuid,
             timestamp,
             camera_id,
@@ -203,19 +200,14 @@ def add_alarm():
             confidence,
             'active',
             ''
-        ))
+        ), owner=owner)
         
-        conn.commit()
-        alarm_id = cursor.lastrowid
-        conn.close()
-        
-        print(f"💾 Alarm saved: ID={alarm_id}, UUID={alarm_uuid}, Camera={camera_id}, Confidence={confidence}")
+        print(f"💾 Alarm queued: UUID={alarm_uuid}, Camera={camera_id}, Owner={owner}, Confidence={confidence}")
         
         return jsonify({
             'success': True,
-            'alarm_id': alarm_id,
             'uuid': alarm_uuid
-        })
+        }), 202
         
     except Exception as e:
         print(f"❌ Error saving alarm: {e}")
@@ -223,47 +215,221 @@ def add_alarm():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# /api/history output field -> alarms columns it needs (id is always selected)
+HISTORY_FIELDS = {
+    "uuid": ("uuid",),
+    "time": ("timestamp",),
+    "date": ("timestamp",),
+    "camera": ("camera_id",),
+    "zone": ("zone",),
+    "confidence": ("confidence",),
+    "status": ("status",),
+    "image": ("image_path",),
+}
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 500
+# Ids are assigned at insert but become visible at commit, so concurrent writers (both alarm
+# writers, add-alarm) can commit a lower id after a higher X-Max-Id was handed out. Deltas
+# re-read this many ids below the cursor and the ETag fingerprints the same window.
+HISTORY_DELTA_OVERLAP = 50
+# Delta cursors; left out of the ETag so a poll that advances them still matches
+HISTORY_CURSOR_ARGS = ("since_id", "since_version")
+
+def _history_time(value, name):
+    """Normalise a since/until parameter to a MySQL DATETIME literal (compared with alarms.occurred_at)."""
+    from datetime import datetime
+    try:
+        parsed = datetime.fromisoformat(value.replace('T', ' ').replace('Z', ''))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime")
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def build_history_query(args):
+    """SQL, params and output fields for /api/history query args. Raises ValueError on bad input.
+
+    Pages are keyset-based: ``before_id`` walks back from a cursor (newest
+    first), ``after_id`` returns rows newer than a cursor. Each filter is an
+    equality/range on columns indexed together with id or occurred_at (see
+    migrations.MIGRATIONS).
+    """
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or list(HISTORY_FIELDS)
+    unknown = [f for f in fields if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    columns = ["id"] + sorted({col for f in fields for col in HISTORY_FIELDS[f]})
+
+    where, params = [], []
+    if args.get('owner'):
+        where.append("owner = %s")
+        params.append(args['owner'])
+    if args.get('camera'):
+        where.append("camera_id = %s")
+        params.append(args['camera'])
+    if args.get('status'):
+        statuses = [st.strip() for st in args['status'].split(',') if st.strip()]
+        if not statuses:
+            raise ValueError("status must list at least one value")
+        where.append(f"status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    for name, op in (('min_conf', '>='), ('max_conf', '<=')):
+        if args.get(name):
+            try:
+                params.append(float(args[name]))
+            except ValueError:
+                raise ValueError(f"{name} must be a number")
+            where.append(f"confidence {op} %s")
+    for name, op in (('since', '>='), ('until', '<=')):
+        if args.get(name):
+            where.append(f"occurred_at {op} %s")
+            params.append(_history_time(args[name], name))
+
+    try:
+        limit = min(max(1, int(args.get('limit', HISTORY_DEFAULT_LIMIT))), HISTORY_MAX_LIMIT)
+        before_id = int(args['before_id']) if args.get('before_id') else None
+        after_id = int(args['after_id']) if args.get('after_id') else None
+        since_id = int(args['since_id']) if args.get('since_id') else None
+        since_version = int(args['since_version']) if args.get('since_version') else None
+    except ValueError:
+        raise ValueError("limit, before_id, after_id, since_id and since_version must be integers")
+
+    # Delta mode: alarms added after since_id, plus (with since_version) rows whose
+    # status changed after that version - both sides are index lookups (PK / version)
+    if since_id is not None:
+        # Clients merge rows by db_id, so re-sent overlap rows are harmless
+        since_id = max(0, since_id - HISTORY_DELTA_OVERLAP)
+        limit += HISTORY_DELTA_OVERLAP
+        if since_version is not None:
+            where.append("(id > %s OR version > %s)")
+            params.extend([since_id, since_version])
+        else:
+            where.append("id > %s")
+            params.append(since_id)
+
+    order = "DESC"
+    if before_id is not None:
+        where.append("id < %s")
+        params.append(before_id)
+    if after_id is not None:
+        where.append("id > %s")
+        params.append(after_id)
+        # Oldest-first so a capped page starts right after the cursor; reversed below
+        order = "ASC" if before_id is None else "DESC"
+
+    sql = f"SELECT {', '.join(columns)} FROM alarms"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # One extra row tells whether another page exists
+    sql += f" ORDER BY id {order} LIMIT %s"
+    params.append(limit + 1)
+    return sql, params, fields, limit, order == "ASC"
+
+def format_history_row(row, fields):
+    item = {"id": f"ALM-{row.get('id', 0):03d}", "db_id": row.get('id', 0)}
+    timestamp = str(row.get('timestamp') or '')
+    for field in fields:
+        if field == "uuid":
+            item["uuid"] = str(row.get('uuid', ''))
+        elif field == "time":
+            item["time"] = timestamp.split(' ')[1] if ' ' in timestamp else ""
+        elif field == "date":
+            item["date"] = timestamp.split(' ')[0]
+        elif field == "camera":
+            item["camera"] = str(row.get('camera_id', ''))
+        elif field == "zone":
+            item["zone"] = str(row.get('zone', ''))
+        elif field == "confidence":
+            item["confidence"] = float(row.get('confidence', 0) or 0)
+        elif field == "status":
+            item["status"] = str(row.get('status', 'Unverified'))
+        elif field == "image":
+            item["image"] = str(row.get('image_path', ''))
+    return item
+
+def history_version(cursor):
+    """(newest alarm id, rows in the delta overlap window, alarm change version).
+
+    Primary-key lookups plus a PK range count of HISTORY_DELTA_OVERLAP ids, so a
+    late commit below the newest id still changes the ETag.
+    """
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM alarms")
+    max_id = int((cursor.fetchone() or {}).get('max_id') or 0)
+    cursor.execute("SELECT COUNT(*) AS recent FROM alarms WHERE id > %s",
+                   (max_id - HISTORY_DELTA_OVERLAP,))
+    recent = int((cursor.fetchone() or {}).get('recent') or 0)
+    try:
+        cursor.execute("SELECT version FROM alarm_changes WHERE id = 1")
+        version = int((cursor.fetchone() or {}).get('version') or 0)
+    except Exception as e:
+        # alarm_changes missing (older schema): ETag then only tracks new alarms
+        print(f"⚠️ History version lookup failed: {e}")
+        version = 0
+    return max_id, recent, version
+
+def history_etag(args, max_id, recent, version):
+    """Weak ETag for a history response: the table state plus every query arg except HISTORY_CURSOR_ARGS."""
+    query = sorted((k, v) for k, values in args.lists() if k not in HISTORY_CURSOR_ARGS for v in values)
+    return f"{max_id}.{recent}.{version}.{zlib.crc32(repr(query).encode()):08x}"
+
 @user_bp.route('/history', methods=['GET'])
 def get_history():
-    """Ultra-simplified history endpoint - guaranteed to return valid response"""
-    print("🚀 GET /api/history called")
-    
+    """Alarm history, newest first, as a JSON array.
+
+    Query args: owner, camera, status (comma list), min_conf/max_conf, since/until,
+    fields (projection), limit, and before_id/after_id cursors. X-Next-Before-Id
+    is the cursor for the next older page, X-Newest-Id the one to poll newer
+    rows with, and X-Has-More tells whether the query stopped at ``limit``.
+
+    Incremental sync: the weak ETag combines the newest alarm id, the row count
+    of the overlap window below it, the alarm change version and the filters, so
+    an unchanged poll with If-None-Match is answered 304 after three index
+    lookups. ``since_id`` (+ ``since_version``) returns alarms added (or
+    changed) after the X-Max-Id / X-Version values of a previous response,
+    plus the last HISTORY_DELTA_OVERLAP ids to catch rows committed late.
+    """
+    try:
+        sql, params, fields, limit, ascending = build_history_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Always return a valid response, even if DB fails
     try:
         conn = get_db_connection()
-        print(f"📍 Connection result: {conn}")
-        
         if not conn:
             print("❌ No DB connection - returning empty array")
             return jsonify([])  # Return empty array instead of error
         
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM alarms ORDER BY id DESC LIMIT 100")
-        rows = cursor.fetchall() or []
-        conn.close()
-        
-        print(f"✅ Found {len(rows)} alarms")
+        try:
+            cursor = conn.cursor(dictionary=True)
+            max_id, recent, version = history_version(cursor)
+            etag = history_etag(request.args, max_id, recent, version)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() or []
+        finally:
+            conn.close()
         
-        result = []
-        for row in rows:
-            result.append({
-                "id": f"ALM-{row.get('id', 0):03d}",
-                "db_id": row.get('id', 0),
-                "uuid": str(row.get('uuid', '')),
-                "time": "",
-                "date": "",
-                "camera": str(row.get('camera_id', '')),
-                "zone": str(row.get('zone', '')),
-                "confidence": float(row.get('confidence', 0) or 0),
-                "status": str(row.get('status', 'Unverified')),
-                "image": str(row.get('image_path', ''))
-            })
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if ascending:
+            rows.reverse()
         
-        print(f"✅ Returning {len(result)} items")
-        return jsonify(result)
+        response = jsonify([format_history_row(row, fields) for row in rows])
+        response.set_etag(etag, weak=True)
+        # Clients must revalidate every poll (cheap 304) instead of trusting a stale copy
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Max-Id'] = str(max_id)
+        response.headers['X-Version'] = str(version)
+        response.headers['X-Has-More'] = 'true' if has_more else 'false'
+        if rows:
+            response.headers['X-Next-Before-Id'] = str(rows[-1]['id'])
+            response.headers['X-Newest-Id'] = str(rows[0]['id'])
+        return response
         
     except Exception as e:
-        print(f"❌ Exception: {e}")
+        print(f"❌ History query failed: {e}")
         return jsonify([])  # Return empty array on any error
 
 @user_bp.route('/history/update-status', methods=['POST'])
@@ -278,7 +444,17 @@ def update_history_status():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("UPDATE alarms SET status = %s WHERE id = %s", (new_status, db_id))
+        # Stamp the change so /api/history ETags change and since_id deltas include the row
+        try:
+            version = bump_alarm_version(c)
+        except Exception as e:
+            # alarm_changes missing (older schema): still save the status, just unversioned
+            print(f"⚠️ Alarm version bump failed: {e}")
+            version = None
+        if version is None:
+            c.execute("UPDATE alarms SET status = %s WHERE id = %s", (new_status, db_id))
+        else:
+            c.execute("UPDATE alarms SET status = %s, version = %s WHERE id = %s", (new_status, version, db_id))
         conn.commit()
         conn.close()
         return jsonify({'status': 'success', 'message': 'Status updated'})
@@ -378,11 +554,7 @@ def send_fire_alert():
     
     try:
         # Fetch user's notification settings
-        conn = get_db_connection()
-        c = conn.cursor(dictionary=True)
-        c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-        settings = c.fetchone()
-        conn.close()
+        settings = notification_cache.get(username)
         
         if not settings:
             return jsonify({'error': 'Notification settings not configured'}), 404
@@ -17,11 +17,15 @@ except ImportError:
 import mysql.connector
 from .notifier import TelegramNotifier, EmailNotifier, SMSNotifier
 from ..database import get_db_connection
+from .alarm_writer import writer_from_env
 
 # Global State
 model = None
 sessions = {}
 
+# Alarm rows are persisted by a background writer so a slow MySQL never freezes the stream
+alarm_writer = writer_from_env(get_db_connection)
+
 def load_model():
     global model
     
@@ -234,24 +238,17 @@ def generate_frames(session_id):
                         sms_notifier.send_fire_alert(os.getenv("SMS_PHONE_NUMBER"), camera_display_name)
                      except: pass
                 
-                # 4. DATABASE LOG
+                # 4. DATABASE LOG (queued; written in batches off the video loop)
                 try:
-                    conn = get_db_connection()
-                    c = conn.cursor()
                     max_conf = 0
                     for d in detections:
                         if d['confidence'] > max_conf: max_conf = d['confidence']
                     
-                    c.execute('''
-                        INSERT INTO alarms (uuid, timestamp, camera_id, zone, confidence, status, image_path)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ''', (
+                    alarm_writer.enqueue((
                         session_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                         camera_display_name, "Zone A", int(max_conf * 100), "Baru", ""
-                    ))
-                    conn.commit()
-                    conn.close()
-                    print("💾 Alarm stored to DB.")
+                    ), owner=session.get('owner'))
+                    print("💾 Alarm queued for DB.")
                 except Exception as e:
                     print(f"❌ DB Log Error: {e}")
 
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class SettingsCache:
+    """TTL + LRU cache of per-user settings rows loaded on demand.
+
+    ``get`` returns the cached row (``None`` rows are cached too, so users
+    without settings don't hit MySQL on every fire frame) until it is older than
+    ``ttl`` seconds; the least recently used entry is dropped beyond
+    ``max_entries``. Writers ``put`` the row they just saved (or ``invalidate``);
+    a load that was already running when that happened is returned but not
+    cached, so it can't put the pre-update row back. Other services sharing
+    the table see the change within ``ttl``.
+    """
+
+    def __init__(self, loader, ttl: float = 60.0, max_entries: int = 1024):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()  # key -> (value, loaded_at)
+        self._generations = {}  # key -> write count, bumped by put / invalidate
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            value, loaded_at = self._entries.get(key, (_MISSING, 0.0))
+            if value is not _MISSING:
+                if now - loaded_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self.expired += 1
+            self.misses += 1
+            generation = self._generations.get(key, 0)
+
+        value = self.loader(key)
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._store(key, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "ttl_s": self.ttl,
+            }
+
+
+def _load_notification_settings(username):
+    from ..database import get_db_connection
+    conn = get_db_connection()
+    if conn is None:
+        raise ConnectionError("no database connection")
+    try:
+        c = conn.cursor(dictionary=True)
+        c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
+        return c.fetchone()
+    finally:
+        conn.close()
+
+
+# notification_settings rows by username (NOTIFICATION_CACHE_TTL_S / NOTIFICATION_CACHE_SIZE)
+notification_cache = SettingsCache(
+    _load_notification_settings,
+    ttl=float(os.getenv("NOTIFICATION_CACHE_TTL_S", 60)),
+    max_entries=int(os.getenv("NOTIFICATION_CACHE_SIZE", 1024)),
+)
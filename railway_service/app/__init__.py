@@ -41,9 +41,13 @@ def create_app():
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
+        from .database import pool
+        from .services.settings_cache import notification_cache
         return jsonify({
             'status': 'running',
-            'service': 'backend-railway'
+            'service': 'backend-railway',
+            'db_pool': pool.stats(),
+            'notification_cache': notification_cache.stats()
         })
         
     return app
@@ -1,20 +1,34 @@
 import mysql.connector
 import os
+from .db_pool import ConnectionPool
+from .migrations import run_migrations
 
-def get_db_connection():
-    # DEBUG: Print connection source (Masked password)
+def _connect():
     host = os.getenv('DB_HOST') or os.getenv('MYSQLHOST', 'localhost')
     user = os.getenv('DB_USER') or os.getenv('MYSQLUSER', 'root')
-    print(f"🔌 CONNECTING TO DB: Host={host}, User={user}")
+    print(f"🔌 Opening DB connection: Host={host}, User={user}")
     
     return mysql.connector.connect(
         host=host,
         user=user,
         password=os.getenv('DB_PASSWORD') or os.getenv('MYSQLPASSWORD', ''),
         database=os.getenv('DB_NAME') or os.getenv('MYSQLDATABASE', 'firevision'),
-        port=int(os.getenv('DB_PORT') or os.getenv('MYSQLPORT', 3306))
+        port=int(os.getenv('DB_PORT') or os.getenv('MYSQLPORT', 3306)),
+        connection_timeout=10
     )
 
+# Shared by every route; close() returns a connection to the pool
+pool = ConnectionPool(
+    _connect,
+    size=int(os.getenv('DB_POOL_SIZE', 5)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    ping_after=float(os.getenv('DB_POOL_PING_AFTER', 30))
+)
+
+def get_db_connection():
+    """Borrow a pooled connection (raises PoolTimeout when none frees up in time)."""
+    return pool.acquire()
+
 def init_db():
     try:
         print("🛠️ INITIALIZING DATABASE...")
@@ -126,6 +140,12 @@ def init_db():
         ''')
         
         conn.commit()
+
+        # Versioned schema changes (indexes, typed alarm columns); see migrations.MIGRATIONS
+        try:
+            run_migrations(conn)
+        except Exception as e:
+            print(f"Schema migration warning (Non-fatal, retried next startup): {e}")
         conn.close()
         print(f"✅ Database initialized ({db_name}: alarms, users, notification_settings, password_resets)")
     except Exception as e:
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from ..utils.decorators import token_required
 from ..database import get_db_connection
+from ..services.settings_cache import notification_cache
 # from ..services import detector (Removed: Service decoupled)
 
 user_bp = Blueprint('user', __name__, url_prefix='/api')
@@ -73,13 +74,11 @@ def notification_settings_api(current_user):
     if not username:
         return jsonify({'error': 'Username required'}), 400
 
-    conn = get_db_connection()
-    c = conn.cursor(dictionary=True)
-
     if request.method == 'GET':
+        # Served from the cache; a miss loads through its own pooled connection,
+        # so none is held here while waiting for it
         try:
-            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
-            settings = c.fetchone()
+            settings = notification_cache.get(username)
             if not settings:
                 # Return defaults
                 settings = {
@@ -92,10 +91,10 @@ def notification_settings_api(current_user):
             return jsonify(settings)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-        finally:
-            conn.close()
 
     elif request.method == 'POST':
+        conn = get_db_connection()
+        c = conn.cursor(dictionary=True)
         try:
             # UPSERT
             sql = """
@@ -127,11 +126,13 @@ def notification_settings_api(current_user):
                 data.get('email_recipient', '')
             )
             c.execute(sql, vals)
+            # Cache exactly the row this transaction wrote (a reload could race older loads)
+            c.execute("SELECT * FROM notification_settings WHERE username = %s", (username,))
+            saved = c.fetchone()
             conn.commit()
             
-            # Update active sessions for this user (REMOVED: Cross-service sync not implemented yet)
-            # Webhook or Polling will handle this in future.
-            pass
+            # Live AI sessions run in another service; they pick the change up when its cache expires
+            notification_cache.put(username, saved)
 
             return jsonify({'status': 'saved'})
         except Exception as e:
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from ..services.email_notifier import EmailNotifier
 from ..services.telegram_notifier import TelegramNotifier
-from ..database import get_db_connection
+from ..services.settings_cache import notification_cache
 import os
 
 webhook_bp = Blueprint('webhook', __name__, url_prefix='/api/webhook')
@@ -41,11 +41,7 @@ def receive_fire_alert():
         return jsonify({'status': 'ignored', 'reason': 'no_username'}), 400
         
     try:
-        conn = get_db_connection()
-        c = conn.cursor(dictionary=True)
-        c.execute("SELECT * FROM notification_settings WHERE username = %s", (target_username,))
-        settings = c.fetchone()
-        conn.close()
+        settings = notification_cache.get(target_username)
         
         if not settings:
              return jsonify({'status': 'no_settings_found'})